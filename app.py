@@ -1,568 +1,769 @@
+import streamlit as st
+from PyPDF2 import PdfReader
+import io
+import pandas as pd
+import functools
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import uuid
+import weakref
 
--- import streamlit as st
--- import zipfile
--- from PyPDF2 import PdfReader, PdfWriter
--- import io
--- import re
--- import pandas as pd
--- import csv
--- import unicodedata
--- 
--- st.set_page_config(page_title="BIM 360 Issue Splitter", layout="wide")
--- st.title("\U0001F4C4 BIM 360 Issue Report Splitter")
--- 
--- uploaded_file = st.file_uploader("Upload BIM 360 Issue Report PDF", type=["pdf"])
--- 
---+
---+def sanitize(value: str) -> str:
---+    """Return a filesystem friendly representation of value."""
---+    return re.sub(r"[^\w\-]", "", unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode())
---+
--- if uploaded_file:
---     pdf_reader = PdfReader(uploaded_file)
---     pages_text = [page.extract_text() for page in pdf_reader.pages]
--- 
----    # Extract page ranges
---+    # Determine page ranges for each issue
---     issue_ids = []
---     issue_starts = []
---     for i, text in enumerate(pages_text):
---         if text:
---             match = re.search(r"ID\s+(\d{6})", text)
---             if match:
----                issue_id = match.group(1)
---+                issue_id = str(int(match.group(1)))
---                 if not issue_ids or issue_id != issue_ids[-1]:
---                     issue_ids.append(issue_id)
---                     issue_starts.append(i)
--- 
---     issue_starts.append(len(pages_text))
---     issue_ranges = [
----        {"Issue ID": issue_ids[i], "start": issue_starts[i], "end": issue_starts[i+1]}
---+        {"Issue ID": issue_ids[i], "start": issue_starts[i], "end": issue_starts[i + 1]}
---         for i in range(len(issue_ids))
---     ]
--- 
---     # Extract metadata from each issue's first page
---     metadata_list = []
----    
----    st.markdown("### 🔧 Customize Filename Format")
----    st.markdown("Use curly braces like `{ID}`, `{Location}`, `{Location Detail}`, `{Equipment ID}`, `{Status}`")
----
----    default_pattern = "Issue_{ID}_{Location Detail}"
----    filename_pattern = st.text_input("Filename Pattern", value=default_pattern, help="Use available fields in {braces} to generate filenames.")
----
----    st.markdown("**Insert Field:**")
----    col1, col2, col3, col4, col5 = st.columns(5)
----    if col1.button("{ID}"):
----        st.session_state.filename_pattern = st.session_state.get("filename_pattern", default_pattern) + "{ID}"
----    if col2.button("{Location}"):
----        st.session_state.filename_pattern = st.session_state.get("filename_pattern", default_pattern) + "{Location}"
----    if col3.button("{Location Detail}"):
----        st.session_state.filename_pattern = st.session_state.get("filename_pattern", default_pattern) + "{Location Detail}"
----    if col4.button("{Equipment ID}"):
----        st.session_state.filename_pattern = st.session_state.get("filename_pattern", default_pattern) + "{Equipment ID}"
----    if col5.button("{Status}"):
----        st.session_state.filename_pattern = st.session_state.get("filename_pattern", default_pattern) + "{Status}"
----
----    if "filename_pattern" in st.session_state:
----        filename_pattern = st.session_state.filename_pattern
----
----    # Preview logic
----    def preview_filename(issue_meta, pattern):
----        try:
----            return pattern.format(**issue_meta)
----        except KeyError:
----            return "Missing fields"
----
----    st.markdown("#### 📂 Filename Previews")
----    for meta in metadata_list[:5]:
----        st.markdown("- " + preview_filename(meta, filename_pattern))
----
----
----for issue in issue_ranges:
---+    for issue in issue_ranges:
---         text = pages_text[issue["start"]]
---         data = {"Issue ID": issue["Issue ID"]}
---         if text:
----            def match_field(field):
---+            def match_field(field: str):
---                 m = re.search(fr"{re.escape(field)}\s+(.*?)\n", text)
---                 return m.group(1).strip() if m else None
--- 
---             fields = [
---                 ("Location", "Location"),
---                 ("Location Detail", "Location Detail"),
---                 ("Equipment ID", "Equipment ID"),
---                 ("Equipment Type", "Equipment Type"),
---                 ("Project Activity", "Project Activity.*?"),
---                 ("Responsible Person", "Responsible Person"),
----                ("Rework Required", "Rework Required\\?"),
---+                ("Rework Required", "Rework Required\?"),
---                 ("Root Cause", "Root cause"),
----                ("Priority", "Priority")
---+                ("Priority", "Priority"),
---             ]
---             for key, field in fields:
---                 val = match_field(field)
---                 if val:
---                     data[key] = val
---         metadata_list.append(data)
--- 
---     st.success(f"Detected {len(issue_ranges)} issues.")
--- 
----    # Prepare field selection and order
----    all_fields = list(metadata_list[0].keys())
----    all_fields.remove("Issue ID")
----
----    st.write("### Customize Filename Fields")
----    selected_fields = st.multiselect(
----        "Select metadata fields to include in filenames:",
----        options=all_fields,
----        default=["Location Detail", "Location"]
---+    # ---------------- Filename customization -----------------
---+    available_fields = sorted({k for meta in metadata_list for k in meta.keys()})
---+    st.markdown("### 🔧 Customize Filename Format")
---+    st.markdown(
---+        "Use curly braces to reference fields. Available fields: "
---+        + ", ".join(f"`{{{f}}}`" for f in available_fields)
---     )
--- 
----    reordered_fields = selected_fields
---+    default_pattern = "ISSUE_{Issue ID}_{Location Detail}"
---+    if "filename_pattern" not in st.session_state:
---+        st.session_state.filename_pattern = default_pattern
--- 
----    separator = st.text_input("Filename separator (e.g. _ or -):", value="_", key="separator_input")
---+    st.text_input(
---+        "Filename Pattern",
---+        key="filename_pattern",
---+    )
--- 
----    # Use actual metadata to build example filename
---+    st.markdown("**Insert Field:**")
---+    cols = st.columns(len(available_fields))
---+    for col, field in zip(cols, available_fields):
---+        if col.button(f"{{{field}}}"):
---+            st.session_state.filename_pattern += f"{{{field}}}"
---+
---+    # Preview example filename
---+    def build_filename(meta: dict) -> str:
---+        clean_meta = {k: sanitize(meta.get(k, "NA")) for k in available_fields}
---+        try:
---+            return st.session_state.filename_pattern.format(**clean_meta) + ".pdf"
---+        except KeyError as e:
---+            return f"Missing {e.args[0]}"
---+
---+    st.markdown("#### 📂 Filename Preview")
---     if metadata_list:
----        first_issue_meta = metadata_list[0]
----        example_values = [
----            re.sub(r'[^\w\-]', '', unicodedata.normalize('NFKD', str(first_issue_meta.get(f, 'NA'))).encode('ascii', 'ignore').decode())
----            for f in reordered_fields
----        ]
----        example_filename = f"ISSUE{separator}{first_issue_meta['Issue ID']}"
----        if example_values:
----            example_filename += separator + separator.join(example_values)
----        example_filename += ".pdf"
----        st.info(f"Example filename: {example_filename}")
----
----    # Generate ZIP and CSV
---+        st.info(build_filename(metadata_list[0]))
---+
---+    # ---------------- Generate files -----------------
---     if st.button("Generate Issue PDFs"):
---         zip_buffer = io.BytesIO()
---         csv_output = io.StringIO()
---         csv_writer = csv.writer(csv_output)
----        csv_writer.writerow(["Filename", "Issue ID"] + reordered_fields)
---+        csv_writer.writerow(["Filename"] + available_fields)
--- 
---         with zipfile.ZipFile(zip_buffer, "w") as zipf:
---             uploaded_file.seek(0)
---             pdf = PdfReader(uploaded_file)
----
---             for issue, meta in zip(issue_ranges, metadata_list):
---                 writer = PdfWriter()
---                 for p in range(issue["start"], issue["end"]):
---                     writer.add_page(pdf.pages[p])
--- 
----                values = [meta.get(field, "NA") for field in reordered_fields]
----                cleaned_values = [
----                    re.sub(r'[^\w\-]', '', unicodedata.normalize('NFKD', str(v)).encode('ascii', 'ignore').decode())
----                    for v in values
----                ]
----                filename = f"ISSUE{separator}{meta['Issue ID']}"
----                if cleaned_values:
----                    filename += separator + separator.join(cleaned_values)
----                filename += ".pdf"
---+                clean_meta = {k: sanitize(meta.get(k, "NA")) for k in available_fields}
---+                filename = st.session_state.filename_pattern.format(**clean_meta) + ".pdf"
--- 
---                 pdf_output = io.BytesIO()
---                 writer.write(pdf_output)
---                 pdf_output.seek(0)
---                 zipf.writestr(filename, pdf_output.getvalue())
--- 
----                csv_writer.writerow([filename, meta['Issue ID']] + values)
---+                csv_writer.writerow([filename] + [meta.get(f, "") for f in available_fields])
--- 
----        st.download_button("Download ZIP of All Issues", data=zip_buffer.getvalue(), file_name="ISSUE_REPORTS.ZIP")
---+        st.download_button(
---+            "Download ZIP of All Issues",
---+            data=zip_buffer.getvalue(),
---+            file_name="ISSUE_REPORTS.ZIP",
---+        )
--- 
----        # Show summary table using selected fields
---         summary_df = pd.read_csv(io.StringIO(csv_output.getvalue()))
---         st.write("### \U0001F4CB Summary of Generated Issues")
---         st.dataframe(summary_df, use_container_width=True)
--+import streamlit as st
--+import zipfile
--+from PyPDF2 import PdfReader, PdfWriter
--+import io
--+import re
--+import pandas as pd
--+import csv
--+import unicodedata
--+
--+st.set_page_config(page_title="BIM 360 Issue Splitter", layout="wide")
--+st.title("\U0001F4C4 BIM 360 Issue Report Splitter")
--+
--+uploaded_file = st.file_uploader("Upload BIM 360 Issue Report PDF", type=["pdf"])
--+
--+
--+def sanitize(value: str) -> str:
--+    """Return a filesystem friendly representation of value."""
--+    return re.sub(r"[^\w\-]", "", unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode())
--+
--+
--+def normalize_issue_id(raw: str) -> str:
--+    """Return the issue ID without leading or trailing zeros."""
--+    raw_str = str(raw).strip()
--+
--+    # Extract the numeric portion if present
--+    match = re.search(r"\d+", raw_str)
--+    if match:
--+        digits = match.group(0)
--+        digits = digits.lstrip("0").rstrip("0")
--+        return digits or "0"
--+
--+    # Fall back to original string if no digits are found
--+    return raw_str
--+
--+if uploaded_file:
--+    pdf_reader = PdfReader(uploaded_file)
--+    pages_text = [page.extract_text() for page in pdf_reader.pages]
--+
--+    # Determine page ranges for each issue
--+    issue_ids = []
--+    issue_starts = []
--+    for i, text in enumerate(pages_text):
--+        if text:
--+            match = re.search(r"ID\s+(\d+)", text)
--+            if match:
--+                issue_id = normalize_issue_id(match.group(1))
--+                if not issue_ids or issue_id != issue_ids[-1]:
--+                    issue_ids.append(issue_id)
--+                    issue_starts.append(i)
--+
--+    issue_starts.append(len(pages_text))
--+    issue_ranges = [
--+        {"Issue ID": issue_ids[i], "start": issue_starts[i], "end": issue_starts[i + 1]}
--+        for i in range(len(issue_ids))
--+    ]
--+
--+    # Extract metadata from each issue's first page
--+    metadata_list = []
--+    for issue in issue_ranges:
--+        text = pages_text[issue["start"]]
--+        data = {"Issue ID": issue["Issue ID"]}
--+        if text:
--+            def match_field(field: str):
--+                m = re.search(fr"{re.escape(field)}\s+(.*?)\n", text)
--+                return m.group(1).strip() if m else None
--+
--+            fields = [
--+                ("Location", "Location"),
--+                ("Location Detail", "Location Detail"),
--+                ("Equipment ID", "Equipment ID"),
--+                ("Equipment Type", "Equipment Type"),
--+                ("Project Activity", "Project Activity.*?"),
--+                ("Responsible Person", "Responsible Person"),
--+                ("Rework Required", "Rework Required\?"),
--+                ("Root Cause", "Root cause"),
--+                ("Priority", "Priority"),
--+            ]
--+            for key, field in fields:
--+                val = match_field(field)
--+                if val:
--+                    data[key] = val
--+        metadata_list.append(data)
--+
--+    st.success(f"Detected {len(issue_ranges)} issues.")
--+
--+    # ---------------- Filename customization -----------------
--+    available_fields = sorted({k for meta in metadata_list for k in meta.keys()})
--+    st.markdown("### 🔧 Customize Filename Format")
--+    st.markdown(
--+        "Use curly braces to reference fields. Available fields: "
--+        + ", ".join(f"`{{{f}}}`" for f in available_fields)
--+    )
--+
--+    default_pattern = "ISSUE_{Issue ID}_{Location Detail}"
--+    if "filename_pattern" not in st.session_state:
--+        st.session_state.filename_pattern = default_pattern
--+
--+    st.text_input(
--+        "Filename Pattern",
--+        key="filename_pattern",
--+    )
--+
--+    st.markdown("**Insert Field:**")
--+    cols = st.columns(len(available_fields))
--+    for col, field in zip(cols, available_fields):
--+        if col.button(f"{{{field}}}"):
--+            st.session_state.filename_pattern += f"{{{field}}}"
--+
--+    # Preview example filename
--+    def build_filename(meta: dict) -> str:
--+        clean_meta = {}
--+        for key in available_fields:
--+            value = meta.get(key, "NA")
--+            if key == "Issue ID":
--+                value = normalize_issue_id(value)
--+            clean_meta[key] = sanitize(value)
--+        try:
--+            return st.session_state.filename_pattern.format(**clean_meta) + ".pdf"
--+        except KeyError as e:
--+            return f"Missing {e.args[0]}"
--+
--+    st.markdown("#### 📂 Filename Preview")
--+    if metadata_list:
--+        st.info(build_filename(metadata_list[0]))
--+
--+    # ---------------- Generate files -----------------
--+    if st.button("Generate Issue PDFs"):
--+        zip_buffer = io.BytesIO()
--+        csv_output = io.StringIO()
--+        csv_writer = csv.writer(csv_output)
--+        csv_writer.writerow(["Filename"] + available_fields)
--+
--+        with zipfile.ZipFile(zip_buffer, "w") as zipf:
--+            uploaded_file.seek(0)
--+            pdf = PdfReader(uploaded_file)
--+            for issue, meta in zip(issue_ranges, metadata_list):
--+                writer = PdfWriter()
--+                for p in range(issue["start"], issue["end"]):
--+                    writer.add_page(pdf.pages[p])
--+
--+                clean_meta = {}
--+                for key in available_fields:
--+                    value = meta.get(key, "NA")
--+                    if key == "Issue ID":
--+                        value = normalize_issue_id(value)
--+                    clean_meta[key] = sanitize(value)
--+
--+                filename = (
--+                    st.session_state.filename_pattern.format(**clean_meta) + ".pdf"
--+                )
--+
--+                pdf_output = io.BytesIO()
--+                writer.write(pdf_output)
--+                pdf_output.seek(0)
--+                zipf.writestr(filename, pdf_output.getvalue())
--+
--+                row_values = []
--+                for key in available_fields:
--+                    value = meta.get(key, "")
--+                    if key == "Issue ID":
--+                        value = normalize_issue_id(value)
--+                    row_values.append(value)
--+
--+                csv_writer.writerow([filename] + row_values)
--+
--+        st.download_button(
--+            "Download ZIP of All Issues",
--+            data=zip_buffer.getvalue(),
--+            file_name="ISSUE_REPORTS.ZIP",
--+        )
--+
--+        summary_df = pd.read_csv(io.StringIO(csv_output.getvalue()))
--+        st.write("### \U0001F4CB Summary of Generated Issues")
--+        st.dataframe(summary_df, use_container_width=True)
-+import streamlit as st
-+import zipfile
-+from PyPDF2 import PdfReader, PdfWriter
-+import io
-+import re
-+import pandas as pd
-+import csv
-+import unicodedata
-+
-+st.set_page_config(page_title="BIM 360 Issue Splitter", layout="wide")
-+st.title("\U0001F4C4 BIM 360 Issue Report Splitter")
-+
-+uploaded_file = st.file_uploader("Upload BIM 360 Issue Report PDF", type=["pdf"])
-+
-+
-+def sanitize(value: str) -> str:
-+    """Return a filesystem friendly representation of value."""
-+    return re.sub(r"[^\w\-]", "", unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode())
-+
-+
-+def normalize_issue_id(raw: str) -> str:
-+    """Return the issue ID without leading zeros."""
-+    raw_str = str(raw).strip()
-+
-+    # Extract the numeric portion if present
-+    match = re.search(r"\d+", raw_str)
-+    if match:
-+        digits = match.group(0)
-+        digits = digits.lstrip("0")
-+        return digits or "0"
-+
-+    # Fall back to original string if no digits are found
-+    return raw_str
-+
-+if uploaded_file:
-+    pdf_reader = PdfReader(uploaded_file)
-+    pages_text = [page.extract_text() for page in pdf_reader.pages]
-+
-+    # Determine page ranges for each issue
-+    issue_ids = []
-+    issue_starts = []
-+    for i, text in enumerate(pages_text):
-+        if text:
-+            match = re.search(r"ID\s+(\d+)", text)
-+            if match:
-+                issue_id = normalize_issue_id(match.group(1))
-+                if not issue_ids or issue_id != issue_ids[-1]:
-+                    issue_ids.append(issue_id)
-+                    issue_starts.append(i)
-+
-+    issue_starts.append(len(pages_text))
-+    issue_ranges = [
-+        {"Issue ID": issue_ids[i], "start": issue_starts[i], "end": issue_starts[i + 1]}
-+        for i in range(len(issue_ids))
-+    ]
-+
-+    # Extract metadata from each issue's first page
-+    metadata_list = []
-+    for issue in issue_ranges:
-+        text = pages_text[issue["start"]]
-+        data = {"Issue ID": issue["Issue ID"]}
-+        if text:
-+            def match_field(field: str):
-+                m = re.search(fr"{re.escape(field)}\s+(.*?)\n", text)
-+                return m.group(1).strip() if m else None
-+
-+            fields = [
-+                ("Location", "Location"),
-+                ("Location Detail", "Location Detail"),
-+                ("Equipment ID", "Equipment ID"),
-+                ("Equipment Type", "Equipment Type"),
-+                ("Project Activity", "Project Activity.*?"),
-+                ("Responsible Person", "Responsible Person"),
-+                ("Rework Required", "Rework Required\?"),
-+                ("Root Cause", "Root cause"),
-+                ("Priority", "Priority"),
-+            ]
-+            for key, field in fields:
-+                val = match_field(field)
-+                if val:
-+                    data[key] = val
-+        metadata_list.append(data)
-+
-+    st.success(f"Detected {len(issue_ranges)} issues.")
-+
-+    # ---------------- Filename customization -----------------
-+    available_fields = sorted({k for meta in metadata_list for k in meta.keys()})
-+    st.markdown("### 🔧 Customize Filename Format")
-+    st.markdown(
-+        "Use curly braces to reference fields. Available fields: "
-+        + ", ".join(f"`{{{f}}}`" for f in available_fields)
-+    )
-+
-+    default_pattern = "ISSUE_{Issue ID}_{Location Detail}"
-+    if "filename_pattern" not in st.session_state:
-+        st.session_state.filename_pattern = default_pattern
-+
-+    st.text_input(
-+        "Filename Pattern",
-+        key="filename_pattern",
-+    )
-+
-+    st.markdown("**Insert Field:**")
-+    cols = st.columns(len(available_fields))
-+    for col, field in zip(cols, available_fields):
-+        if col.button(f"{{{field}}}"):
-+            st.session_state.filename_pattern += f"{{{field}}}"
-+
-+    # Preview example filename
-+    def build_filename(meta: dict) -> str:
-+        clean_meta = {}
-+        for key in available_fields:
-+            value = meta.get(key, "NA")
-+            if key == "Issue ID":
-+                value = normalize_issue_id(value)
-+            clean_meta[key] = sanitize(value)
-+        try:
-+            return st.session_state.filename_pattern.format(**clean_meta) + ".pdf"
-+        except KeyError as e:
-+            return f"Missing {e.args[0]}"
-+
-+    st.markdown("#### 📂 Filename Preview")
-+    if metadata_list:
-+        st.info(build_filename(metadata_list[0]))
-+
-+    # ---------------- Generate files -----------------
-+    if st.button("Generate Issue PDFs"):
-+        zip_buffer = io.BytesIO()
-+        csv_output = io.StringIO()
-+        csv_writer = csv.writer(csv_output)
-+        csv_writer.writerow(["Filename"] + available_fields)
-+
-+        with zipfile.ZipFile(zip_buffer, "w") as zipf:
-+            uploaded_file.seek(0)
-+            pdf = PdfReader(uploaded_file)
-+            for issue, meta in zip(issue_ranges, metadata_list):
-+                writer = PdfWriter()
-+                for p in range(issue["start"], issue["end"]):
-+                    writer.add_page(pdf.pages[p])
-+
-+                clean_meta = {}
-+                for key in available_fields:
-+                    value = meta.get(key, "NA")
-+                    if key == "Issue ID":
-+                        value = normalize_issue_id(value)
-+                    clean_meta[key] = sanitize(value)
-+
-+                filename = (
-+                    st.session_state.filename_pattern.format(**clean_meta) + ".pdf"
-+                )
-+
-+                pdf_output = io.BytesIO()
-+                writer.write(pdf_output)
-+                pdf_output.seek(0)
-+                zipf.writestr(filename, pdf_output.getvalue())
-+
-+                row_values = []
-+                for key in available_fields:
-+                    value = meta.get(key, "")
-+                    if key == "Issue ID":
-+                        value = normalize_issue_id(value)
-+                    row_values.append(value)
-+
-+                csv_writer.writerow([filename] + row_values)
-+
-+        st.download_button(
-+            "Download ZIP of All Issues",
-+            data=zip_buffer.getvalue(),
-+            file_name="ISSUE_REPORTS.ZIP",
-+        )
-+
-+        summary_df = pd.read_csv(io.StringIO(csv_output.getvalue()))
-+        st.write("### \U0001F4CB Summary of Generated Issues")
-+        st.dataframe(summary_df, use_container_width=True)
+from index_store import load_index, save_index
+from jobs import Job, JobRegistry, JobRejected
+from metadata_table import (
+    clean_frame,
+    metadata_frame,
+    plan_filenames,
+    summary_frame,
+    to_arrow_bytes,
+    to_csv_bytes,
+    to_parquet_bytes,
+)
+from profiling import StageProfiler
+from splitter import (
+    available_fields,
+    filter_issues,
+    index_issues,
+    iter_issues,
+    MappedPdf,
+    ocr_available,
+    open_reader,
+    ReportError,
+    write_issue_pdf,
+    write_issues_zip,
+)
+
+# Jobs from every session share JOB_SLOTS running slots; up to QUEUE_LIMIT
+# more wait for a free one, and each session may have SESSION_JOB_LIMIT jobs
+# queued or running. Each job starts its own worker processes, so the worker
+# inputs below are capped to keep JOB_SLOTS jobs within the CPU count.
+JOB_SLOTS = int(os.environ.get("SPLITTER_JOB_SLOTS", 2))
+QUEUE_LIMIT = int(os.environ.get("SPLITTER_QUEUE_LIMIT", 40))
+SESSION_JOB_LIMIT = int(os.environ.get("SPLITTER_SESSION_JOB_LIMIT", 2))
+MAX_JOB_WORKERS = max(1, (os.cpu_count() or 1) // JOB_SLOTS)
+
+st.set_page_config(page_title="BIM 360 Issue Splitter", layout="wide")
+st.title("\U0001F4C4 BIM 360 Issue Report Splitter")
+
+uploaded_file = st.file_uploader("Upload BIM 360 Issue Report PDF", type=["pdf"])
+
+extract_workers = st.sidebar.number_input(
+    "Text extraction workers",
+    min_value=1,
+    max_value=MAX_JOB_WORKERS,
+    value=min(4, MAX_JOB_WORKERS),
+    help="Processes used to extract page text. Use 1 to extract serially.",
+)
+write_workers = st.sidebar.number_input(
+    "PDF writing workers",
+    min_value=1,
+    max_value=MAX_JOB_WORKERS,
+    value=min(4, MAX_JOB_WORKERS),
+    help="Processes used to write the split PDFs. Use 1 to write serially.",
+)
+zip_compresslevel = st.sidebar.selectbox(
+    "ZIP compression level",
+    options=[None] + list(range(1, 10)),
+    format_func=lambda level: "Store (no compression)" if level is None else str(level),
+    help="Deflate level applied to each PDF in the ZIP.",
+)
+dedupe = st.sidebar.checkbox(
+    "Deduplicate shared resources",
+    value=False,
+    help=(
+        "Write fonts, logos and other streams that the report stores more "
+        "than once only once into each issue PDF."
+    ),
+)
+shared_compresslevel = st.sidebar.selectbox(
+    "Shared stream compression",
+    options=[None] + list(range(1, 10)),
+    format_func=lambda level: "Keep as is" if level is None else str(level),
+    disabled=not dedupe,
+    help="Deflate level for streams used on more than one page of an issue.",
+)
+header_only = st.sidebar.checkbox(
+    "Fast issue detection",
+    value=False,
+    help=(
+        "Look for the issue ID in the page header only and read full text "
+        "just from each issue's first page."
+    ),
+)
+ocr = st.sidebar.checkbox(
+    "OCR scanned pages",
+    value=False,
+    disabled=not ocr_available(),
+    help=(
+        "Read the header of pages without an issue ID in their text with "
+        "Tesseract, using as many processes as text extraction. Needs the "
+        "tesseract program and the pytesseract package."
+    ),
+)
+
+
+# Finished jobs are kept while a session still holds them. Of those no
+# session holds any more, the last PARSES_KEPT parsed reports and ZIPS_KEPT
+# generated ZIPs are kept for reuse, least recently used evicted first.
+PARSES_KEPT = int(os.environ.get("SPLITTER_PARSES_KEPT", 8))
+ZIPS_KEPT = int(os.environ.get("SPLITTER_ZIPS_KEPT", 4))
+
+# Seconds after which a finished job's result is dropped even if a session
+# still holds it, so sessions closed without releasing theirs do not keep
+# generated ZIPs on disk indefinitely.
+RESULT_MAX_AGE = int(os.environ.get("SPLITTER_RESULT_MAX_AGE", 60 * 60))
+
+# Seconds between progress refreshes while a background job runs.
+PROGRESS_INTERVAL = 1.0
+
+# When set, every profiled stage is also appended to this file as JSON lines.
+PROFILE_LOG = os.environ.get("SPLITTER_PROFILE_LOG")
+
+# Uploads at least this large are spooled to a temporary file and read
+# through a memory map, so the report is not also copied into this session.
+SPOOL_MIN_BYTES = int(os.environ.get("SPLITTER_SPOOL_MIN_BYTES", 64 * 1024 * 1024))
+
+
+def content_digest(uploaded) -> str:
+    """Return the SHA-256 of an uploaded file, memoized per upload."""
+    digests = st.session_state.setdefault("upload_digests", {})
+    if uploaded.file_id not in digests:
+        digests.clear()
+        digests[uploaded.file_id] = hashlib.sha256(uploaded.getbuffer()).hexdigest()
+    return digests[uploaded.file_id]
+
+
+def spool_upload(uploaded):
+    """Return the report source for ``uploaded``: its bytes, or a spooled file.
+
+    Large uploads are written out once to a temporary file and returned as
+    a :class:`splitter.MappedPdf`; readers and worker processes then share
+    the file's pages in the OS page cache instead of holding copies.
+    """
+    if uploaded.size < SPOOL_MIN_BYTES:
+        return uploaded.getvalue()
+    fd, path = tempfile.mkstemp(prefix="issue_report_", suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(uploaded.getbuffer())
+    source = MappedPdf(path)
+    # Sessions can end without releasing their document; remove the file
+    # once nothing refers to it any more.
+    weakref.finalize(source, remove_quietly, path)
+    return source
+
+
+def remove_quietly(path: str) -> None:
+    """Remove ``path`` if it still exists."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@st.cache_resource
+def job_queue() -> JobRegistry:
+    """Return the process-wide scheduler for parsing and generation jobs.
+
+    Parses are keyed by ``(digest, header_only, ocr)`` and generations by
+    :func:`generate_key`, so sessions asking for the same work share one
+    job, and recent results are reused without doing it again (see
+    ``PARSES_KEPT`` and ``ZIPS_KEPT``).
+    """
+    return JobRegistry(
+        max_finished={"parse": PARSES_KEPT, "generate": ZIPS_KEPT},
+        max_running=JOB_SLOTS,
+        max_queued=QUEUE_LIMIT,
+        max_per_owner=SESSION_JOB_LIMIT,
+        max_age=RESULT_MAX_AGE,
+    )
+
+
+def session_owner() -> str:
+    """Return the identifier this session uses as a job owner."""
+    return st.session_state.setdefault("job_owner", uuid.uuid4().hex)
+
+
+def session_status(job: Job) -> str:
+    """Return the job's status as this session sees it.
+
+    A job this session has withdrawn from (see :meth:`JobRegistry.release`)
+    may keep running for others, but is cancelled as far as it is concerned.
+    """
+    if job.done or session_owner() in job.owners:
+        return job.status
+    return "cancelled"
+
+
+def run_parse(
+    job: Job,
+    digest: str,
+    source,
+    workers: int,
+    header_only: bool,
+    ocr_workers: int,
+    reader,
+    reader_lock,
+    profile,
+):
+    """Job target: detect the issues in a report and save them to the index.
+
+    ``reader`` is the document's own, so ``reader_lock`` is held while it is
+    in use; changing the detection mode during a generation then waits for
+    the generation to finish with it.
+    """
+    page_count = job.total_pages
+    issue_ranges = []
+    metadata_list = []
+    timings = {}
+    with reader_lock, profile.stage("parse_report", pages=page_count):
+        issues = iter_issues(
+            source,
+            workers=workers,
+            header_only=header_only,
+            reader=reader,
+            timings=timings,
+            ocr_workers=ocr_workers,
+        )
+        try:
+            for issue, meta in issues:
+                issue_ranges.append(issue)
+                metadata_list.append(meta)
+                job.progress(len(issue_ranges), issue["end"])
+        finally:
+            issues.close()
+    profile.record_timings("parse_report", timings, pages=page_count)
+    try:
+        with profile.stage("save_index"):
+            save_index(
+                digest, page_count, header_only, issue_ranges, metadata_list, ocr=bool(ocr_workers)
+            )
+    except OSError as e:
+        # The index only saves reading the report again next time.
+        logging.getLogger(__name__).warning("Could not save the issue index: %s", e)
+    return issue_ranges, metadata_list
+
+
+def run_generate(
+    job: Job,
+    document: dict,
+    entries,
+    summary: pd.DataFrame,
+    workers: int,
+    compresslevel,
+    previous,
+    dedupe: bool,
+    shared_compresslevel,
+):
+    """Job target: write the issue ZIP to a new temporary file.
+
+    The file belongs to the job's result and is removed by
+    :func:`remove_output` once the job is evicted, or straight away if the
+    job fails or is cancelled.
+    """
+    profile = document["profile"]
+    timings = {}
+    stats = {}
+    fd, zip_path = tempfile.mkstemp(prefix="issue_reports_", suffix=".zip")
+    os.close(fd)
+    try:
+        with document["reader_lock"], profile.stage("write_zip", pages=job.total_pages):
+            changes = write_issues_zip(
+                zip_path,
+                document["source"],
+                entries,
+                workers=workers,
+                compresslevel=compresslevel,
+                reader=document["reader"],
+                previous=previous,
+                timings=timings,
+                progress=job.progress,
+                dedupe=dedupe,
+                shared_compresslevel=shared_compresslevel,
+                stats=stats,
+            )
+    except BaseException:
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
+        raise
+    profile.record_timings("write_zip", timings, pages=job.total_pages)
+    return {
+        "zip_path": zip_path,
+        "changes": changes,
+        "had_previous": previous is not None,
+        "bytes_saved": stats.get("bytes_saved") if dedupe else None,
+        "summary": summary,
+    }
+
+
+def remove_output(job: Job) -> None:
+    """Remove the ZIP written by a generation job that is being evicted."""
+    remove_quietly(job.result["zip_path"])
+
+
+def generate_key(doc: dict, filenames, previous, compresslevel, dedupe, shared_compresslevel):
+    """Return the job key for a generation: everything that shapes the ZIP.
+
+    The number of writing workers is left out; it does not change the output.
+    """
+    names = hashlib.sha256("\0".join(filenames).encode("utf-8")).hexdigest()
+    previous_digest = hashlib.sha256(previous.getbuffer()).hexdigest() if previous else None
+    return (
+        doc["digest"],
+        doc["detection"],
+        "generate",
+        names,
+        previous_digest,
+        compresslevel,
+        dedupe,
+        shared_compresslevel,
+    )
+
+
+def open_document(uploaded, workers: int, header_only: bool, ocr_workers: int = 0) -> dict:
+    """Return this session's document for ``uploaded``.
+
+    The document holds the report source (see :func:`spool_upload`), one
+    PdfReader over it and the detected issues, loaded from the sidecar index
+    when the report has been seen before. It is kept in session state across
+    reruns, so the generation step reuses the reader rather than parsing the
+    file again.
+    Uploading a different file releases the previous document first.
+
+    When the issues are not indexed they are detected by a background job,
+    kept as ``document["parse_job"]`` until it finishes; ``issue_ranges``,
+    ``metadata_list`` and ``issue_index`` are only present once it has.
+    ``document["detection"]`` records the ``(header_only, ocr)`` mode they
+    were detected with.
+    """
+    digest = content_digest(uploaded)
+    detection = (header_only, bool(ocr_workers))
+    doc = st.session_state.get("document")
+    if doc is None or doc["digest"] != digest:
+        release_document()
+        profile = StageProfiler(PROFILE_LOG, report=digest[:16], file=uploaded.name)
+        with profile.stage("open_report"):
+            source = spool_upload(uploaded)
+            try:
+                reader = open_reader(source)
+            except ReportError as e:
+                if isinstance(source, MappedPdf):
+                    remove_quietly(source.path)
+                st.error(f"Cannot read {uploaded.name}: {e}.")
+                st.stop()
+            page_count = len(reader.pages)
+        doc = {
+            "digest": digest,
+            "source": source,
+            "reader": reader,
+            "page_count": page_count,
+            "detection": None,
+            "reader_lock": threading.Lock(),
+            "lookup_lock": threading.Lock(),
+            "parse_job": None,
+            "profile": profile,
+        }
+        st.session_state.document = doc
+
+    if doc["detection"] != detection:
+        job = doc["parse_job"]
+        if job is not None and job.key != (digest, *detection):
+            job_queue().release(job, session_owner())
+            job = doc["parse_job"] = None
+        if job is None:
+            profile, page_count = doc["profile"], doc["page_count"]
+            with profile.stage("load_index"):
+                indexed = load_index(digest, page_count, header_only, ocr=bool(ocr_workers))
+            if indexed is not None:
+                set_issues(doc, *indexed, detection)
+                return doc
+            try:
+                job = doc["parse_job"] = job_queue().submit(
+                    (digest, *detection),
+                    run_parse,
+                    digest,
+                    doc["source"],
+                    workers,
+                    header_only,
+                    ocr_workers,
+                    doc["reader"],
+                    doc["reader_lock"],
+                    profile,
+                    owner=session_owner(),
+                    total_pages=page_count,
+                    group="parse",
+                )
+            except JobRejected as e:
+                st.warning(f"The report cannot be read right now: {e}. Try again shortly.")
+                st.button("Try again")
+                st.stop()
+            # Short reports finish before a progress bar would be worth showing.
+            job.wait(PROGRESS_INTERVAL)
+        if job.status == "done":
+            set_issues(doc, *job.result, detection)
+            # The issues now live in the document; the job is only kept for
+            # other sessions to reuse.
+            job_queue().release(job, session_owner())
+            doc["parse_job"] = None
+    return doc
+
+
+def set_issues(doc: dict, issue_ranges, metadata_list, detection: tuple) -> None:
+    """Store the detected issues on ``doc`` with their lookup and tables.
+
+    ``metadata_table`` holds one column per field and ``clean_table`` the
+    same values sanitized for filenames, so patterns are filled column by
+    column without sanitizing again on every rerun.
+    """
+    doc["issue_ranges"] = issue_ranges
+    doc["metadata_list"] = metadata_list
+    doc["issue_index"] = index_issues(issue_ranges)
+    doc.pop("filename_plan", None)
+    with doc["profile"].stage("metadata_table"):
+        doc["metadata_table"] = metadata_frame(metadata_list, available_fields(metadata_list))
+        doc["clean_table"] = clean_frame(doc["metadata_table"])
+    doc["detection"] = detection
+
+
+def filename_plan(doc: dict, pattern: str) -> pd.DataFrame:
+    """Return :func:`plan_filenames` for ``pattern``, reusing the last plan.
+
+    Reruns that leave the pattern alone (filters, downloads, progress
+    refreshes) then skip rendering the filenames of every issue.
+    """
+    cached = doc.get("filename_plan")
+    if cached is None or cached[0] != pattern:
+        cached = doc["filename_plan"] = (pattern, plan_filenames(pattern, doc["clean_table"]))
+    return cached[1]
+
+
+def lookup_reader(doc: dict) -> PdfReader:
+    """Return the reader used to pull out single issues while generating.
+
+    ``doc["reader"]`` is busy on a generation or parse job's thread then, and a
+    PdfReader cannot be shared between threads. Opening it walks the whole
+    page tree, so it is only created when first needed. Downloads are served
+    off the script thread and may overlap, so callers hold
+    ``doc["lookup_lock"]`` while they use it.
+    """
+    if "lookup_reader" not in doc:
+        doc["lookup_reader"] = open_reader(doc["source"])
+    return doc["lookup_reader"]
+
+
+def issue_subset(doc: dict, positions, filenames) -> bytes:
+    """Return the issues at ``positions`` as one PDF, or as a ZIP of several."""
+    issues = [doc["issue_ranges"][p] for p in positions]
+    buffer = io.BytesIO()
+    if doc["reader_lock"].acquire(blocking=False):
+        lock = doc["reader_lock"]
+    else:
+        lock = doc["lookup_lock"]
+        lock.acquire()
+    try:
+        reader = doc["reader"] if lock is doc["reader_lock"] else lookup_reader(doc)
+        with doc["profile"].stage(
+            "subset_download", pages=sum(i["end"] - i["start"] for i in issues)
+        ):
+            if len(issues) == 1:
+                write_issue_pdf(
+                    reader,
+                    issues[0],
+                    buffer,
+                    dedupe=dedupe,
+                    shared_compresslevel=shared_compresslevel,
+                )
+            else:
+                write_issues_zip(
+                    buffer,
+                    doc["source"],
+                    list(zip(filenames, issues)),
+                    compresslevel=zip_compresslevel,
+                    reader=reader,
+                    dedupe=dedupe,
+                    shared_compresslevel=shared_compresslevel,
+                )
+    finally:
+        lock.release()
+    return buffer.getvalue()
+
+
+@st.fragment(run_every=PROGRESS_INTERVAL)
+def show_progress(job: Job, label: str) -> None:
+    """Show a job's queue position or progress with a Cancel button, until it ends.
+
+    Cancelling withdraws this session from the job; it only stops once no
+    other session is waiting for it.
+    """
+    if session_status(job) in ("done", "failed", "cancelled"):
+        st.rerun()
+    position = job_queue().position(job)
+    if position:
+        text = f"{label}: waiting for a free worker, number {position} in the queue"
+    else:
+        text = f"{label}: {job.issues_done} issues, {job.pages_done} of {job.total_pages} pages"
+    st.progress(job.fraction(), text=text)
+    if job.cancelling:
+        st.caption("Cancelling...")
+    elif st.button("Cancel", key=f"cancel_{id(job)}"):
+        job_queue().release(job, session_owner())
+        st.rerun()
+
+
+def release_document() -> None:
+    """Drop this session's document and withdraw it from the document's jobs.
+
+    A spooled report file is removed once no job still reads it, and a
+    generated ZIP once its job is evicted from :func:`job_queue`.
+    """
+    doc = st.session_state.pop("document", None)
+    if doc is not None and doc["parse_job"] is not None:
+        job_queue().release(doc["parse_job"], session_owner())
+    generate_job = st.session_state.pop("generate_job", None)
+    if generate_job is not None:
+        job_queue().release(generate_job, session_owner())
+
+
+def read_file(path: str) -> bytes:
+    """Return the contents of ``path``; used to serve downloads on click."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+if not uploaded_file:
+    release_document()
+
+if uploaded_file:
+    document = open_document(
+        uploaded_file, int(extract_workers), header_only, int(extract_workers) if ocr else 0
+    )
+    parse_job = document["parse_job"]
+    if parse_job is not None:
+        parse_status = session_status(parse_job)
+        if parse_status in ("cancelled", "failed"):
+            if parse_status == "failed":
+                st.error(f"Could not read the report: {parse_job.error}")
+            else:
+                st.warning("Reading the report was cancelled.")
+            if st.button("Read again"):
+                job_queue().release(parse_job, session_owner())
+                document["parse_job"] = None
+                st.rerun()
+        else:
+            show_progress(parse_job, "Reading issue report")
+        st.stop()
+
+    issue_ranges = document["issue_ranges"]
+    metadata_list = document["metadata_list"]
+
+    st.success(f"Detected {len(issue_ranges)} issues.")
+
+    # ---------------- Filename customization -----------------
+    fields = available_fields(metadata_list)
+    st.markdown("### 🔧 Customize Filename Format")
+    st.markdown(
+        "Use curly braces to reference fields. Available fields: "
+        + ", ".join(f"`{{{f}}}`" for f in fields)
+    )
+
+    default_pattern = "ISSUE_{Issue ID}_{Location Detail}"
+    if "filename_pattern" not in st.session_state:
+        st.session_state.filename_pattern = default_pattern
+
+    st.text_input(
+        "Filename Pattern",
+        key="filename_pattern",
+    )
+
+    st.markdown("**Insert Field:**")
+    cols = st.columns(len(fields))
+    for col, field in zip(cols, fields):
+        if col.button(f"{{{field}}}"):
+            st.session_state.filename_pattern += f"{{{field}}}"
+
+    try:
+        plan = filename_plan(document, st.session_state.filename_pattern)
+        filenames = plan["Filename"]
+    except KeyError as e:
+        plan = filenames = None
+        st.error(f"Missing {e.args[0]}")
+    except (ValueError, IndexError) as e:
+        # Half-typed patterns such as "X_{" land here while editing.
+        plan = filenames = None
+        st.error(f"Invalid filename pattern: {e}")
+
+    st.markdown("#### 📂 Filename Preview")
+    if plan is not None and metadata_list:
+        renamed = plan["Filename"] != plan["Rendered"]
+        if renamed.any():
+            st.warning(
+                f"{int(renamed.sum())} issues would share a filename with an "
+                "earlier issue and get a numeric suffix instead."
+            )
+        only_renamed = st.checkbox("Show only renamed files", disabled=not renamed.any())
+        preview = pd.DataFrame(
+            {
+                "Issue ID": document["metadata_table"]["Issue ID"],
+                "Filename": plan["Filename"],
+                "Renamed from": plan["Rendered"].where(renamed, ""),
+            }
+        )
+        st.dataframe(
+            preview[renamed] if only_renamed else preview,
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    # ---------------- Find issues -----------------
+    st.markdown("### 🔎 Find Issues")
+    query = st.text_input("Search", placeholder="Any text in the issue's fields")
+    filters = {}
+    with st.expander("Filter by field"):
+        filter_cols = st.columns(4)
+        for i, field in enumerate(f for f in fields if f != "Issue ID"):
+            options = sorted({meta[field] for meta in metadata_list if field in meta})
+            filters[field] = filter_cols[i % 4].multiselect(field, options)
+    matches = filter_issues(metadata_list, query, filters)
+    st.caption(f"{len(matches)} of {len(metadata_list)} issues match.")
+    st.dataframe(
+        document["metadata_table"].iloc[matches],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    issue_index = document["issue_index"]
+    picked = st.multiselect(
+        "Issues to download",
+        [issue_ranges[p]["Issue ID"] for p in matches],
+        help="Leave empty to download every matching issue.",
+    )
+    positions = [issue_index[i] for i in picked] if picked else matches
+    if positions and filenames is not None:
+        subset_names = list(filenames.iloc[positions])
+        st.download_button(
+            f"Download {len(positions)} Selected Issue{'s' if len(positions) > 1 else ''}",
+            data=functools.partial(issue_subset, document, positions, subset_names),
+            file_name=subset_names[0] if len(positions) == 1 else "SELECTED_ISSUES.ZIP",
+        )
+
+    # ---------------- Generate files -----------------
+    previous_zip = st.file_uploader(
+        "Previous ZIP for this project (optional)",
+        type=["zip"],
+        help=(
+            "Issues unchanged since this archive was generated are copied "
+            "from it instead of being split again."
+        ),
+    )
+
+    generate_job = st.session_state.get("generate_job")
+    generate_status = session_status(generate_job) if generate_job is not None else None
+    if generate_status == "done" and not os.path.exists(generate_job.result["zip_path"]):
+        # Dropped after RESULT_MAX_AGE; generating again rebuilds it.
+        generate_job = generate_status = st.session_state.generate_job = None
+    generating = generate_status in ("queued", "running")
+    blocked = generating or filenames is None
+    if st.button("Generate Issue PDFs", disabled=blocked) and not blocked:
+        with document["profile"].stage("summary_table"):
+            entries = list(zip(filenames, issue_ranges))
+            summary = summary_frame(document["metadata_table"], filenames)
+
+        # The uploader's buffer may be replaced by later reruns.
+        previous = io.BytesIO(previous_zip.getvalue()) if previous_zip else None
+        shared_level = shared_compresslevel if dedupe else None
+        if generate_job is not None:
+            job_queue().release(generate_job, session_owner())
+        try:
+            generate_job = job_queue().submit(
+                generate_key(
+                    document, filenames, previous, zip_compresslevel, dedupe, shared_level
+                ),
+                run_generate,
+                document,
+                entries,
+                summary,
+                int(write_workers),
+                zip_compresslevel,
+                previous,
+                dedupe,
+                shared_level,
+                owner=session_owner(),
+                total_issues=len(entries),
+                total_pages=sum(issue["end"] - issue["start"] for issue in issue_ranges),
+                on_evict=remove_output,
+                group="generate",
+            )
+        except JobRejected as e:
+            generate_job = None
+            st.warning(f"The issue PDFs cannot be generated right now: {e}. Try again shortly.")
+        st.session_state.generate_job = generate_job
+        if generate_job is not None:
+            generate_job.wait(PROGRESS_INTERVAL)
+            generate_status = session_status(generate_job)
+
+    if generate_status == "done":
+        result = generate_job.result
+        changes = result["changes"]
+        if result["had_previous"]:
+            st.info(
+                f"Since the previous ZIP: {len(changes['new'])} new, "
+                f"{len(changes['changed'])} changed, "
+                f"{len(changes['unchanged'])} unchanged ({len(changes['copied'])} copied), "
+                f"{len(changes['removed'])} removed."
+            )
+            with st.expander("Changed issues"):
+                for kind in ("new", "changed", "removed"):
+                    if changes[kind]:
+                        st.markdown(f"**{kind.title()}:** " + ", ".join(changes[kind]))
+
+        if result["bytes_saved"] is not None:
+            st.caption(
+                f"Deduplicating shared resources saved {result['bytes_saved']:,} bytes."
+            )
+        st.download_button(
+            "Download ZIP of All Issues",
+            data=functools.partial(read_file, result["zip_path"]),
+            file_name="ISSUE_REPORTS.ZIP",
+        )
+
+        st.write("### \U0001F4CB Summary of Generated Issues")
+        st.dataframe(result["summary"], use_container_width=True)
+        csv_col, parquet_col, arrow_col = st.columns(3)
+        csv_col.download_button(
+            "Download CSV",
+            data=functools.partial(to_csv_bytes, result["summary"]),
+            file_name="ISSUE_SUMMARY.csv",
+            mime="text/csv",
+        )
+        parquet_col.download_button(
+            "Download Parquet",
+            data=functools.partial(to_parquet_bytes, result["summary"]),
+            file_name="ISSUE_SUMMARY.parquet",
+            mime="application/vnd.apache.parquet",
+        )
+        arrow_col.download_button(
+            "Download Arrow",
+            data=functools.partial(to_arrow_bytes, result["summary"]),
+            file_name="ISSUE_SUMMARY.arrow",
+            mime="application/vnd.apache.arrow.file",
+        )
+    elif generate_status == "cancelled":
+        st.warning("Generation was cancelled.")
+    elif generate_status == "failed":
+        st.error(f"Generation failed: {generate_job.error}")
+    elif generate_job is not None:
+        show_progress(generate_job, "Generating issue PDFs")
+
+    # ---------------- Performance -----------------
+    with st.expander("\u23F1\uFE0F Performance"):
+        st.caption(
+            "Wall time, throughput and peak memory (the app process plus the "
+            "worker processes it started) for each stage "
+            "run on this report. Rows named `stage/part` break down "
+            "the stage they belong to."
+        )
+        st.dataframe(
+            pd.DataFrame(document["profile"].records), use_container_width=True
+        )
@@ -0,0 +1,203 @@
+"""Time each stage of the split pipeline on synthetic BIM 360 reports.
+
+Usage::
+
+    python benchmarks/bench_pipeline.py [--issues N ...] [--pages-per-issue P ...]
+        [--workers W] [--compress-level L] [--header-only] [--output results.json]
+        [--dedupe] [--shared-compress-level L] [--separate-logos] [--resplit]
+
+One synthetic report is built for every combination of ``--issues`` and
+``--pages-per-issue`` and split the way :func:`splitter.split_report` does,
+through :func:`splitter.iter_issues` and :func:`splitter.write_issues_zip`.
+Stages timed: opening the report, text extraction, boundary detection,
+metadata parsing, filename planning, CSV writing, fingerprinting, PDF
+writing and ZIP writing. With ``--resplit`` the report is split a second
+time against the first archive, which times copying unchanged entries
+(``zip_copy``). Results are written as JSON (to stdout unless ``--output``
+is given) so separate runs can be compared. ``--separate-logos`` gives every
+page its own copy of the logo, which is what ``--dedupe`` removes again.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import PyPDF2  # noqa: E402
+
+from splitter import (  # noqa: E402
+    available_fields,
+    format_filename,
+    iter_issues,
+    open_reader,
+    summary_row,
+    unique_filenames,
+    write_issues_zip,
+)
+from synthetic_report import build_report  # noqa: E402
+
+PATTERN = "ISSUE_{Issue ID}_{Location Detail}"
+
+
+def _stage(results: dict, name: str, seconds: float, pages: int) -> None:
+    results[name] = {
+        "seconds": round(seconds, 6),
+        "pages_per_sec": round(pages / seconds, 1) if seconds else None,
+    }
+
+
+def _write_zip(path, pdf_bytes, entries, reader, args, previous=None) -> tuple:
+    """Run :func:`write_issues_zip`; return its timings and bytes saved."""
+    timings = {}
+    stats = {}
+    write_issues_zip(
+        path,
+        pdf_bytes,
+        entries,
+        workers=args.workers,
+        compresslevel=args.compress_level,
+        reader=reader,
+        previous=previous,
+        timings=timings,
+        dedupe=args.dedupe,
+        shared_compresslevel=args.shared_compress_level,
+        stats=stats,
+    )
+    return timings, stats.get("bytes_saved", 0)
+
+
+def run_case(issues: int, pages_per_issue: int, args) -> dict:
+    """Build one synthetic report and time every pipeline stage on it."""
+    pdf_bytes = build_report(
+        issues, pages_per_issue, seed=args.seed, shared_logo=not args.separate_logos
+    )
+    page_count = issues * pages_per_issue
+    stages = {}
+    case_started = time.perf_counter()
+
+    started = time.perf_counter()
+    reader = open_reader(pdf_bytes)
+    _stage(stages, "open_report", time.perf_counter() - started, page_count)
+
+    timings = {}
+    issue_ranges = []
+    metadata_list = []
+    for issue, meta in iter_issues(
+        pdf_bytes,
+        workers=args.workers,
+        header_only=args.header_only,
+        reader=reader,
+        timings=timings,
+    ):
+        issue_ranges.append(issue)
+        metadata_list.append(meta)
+    for name, seconds in timings.items():
+        _stage(stages, name, seconds, page_count)
+
+    started = time.perf_counter()
+    fields = available_fields(metadata_list)
+    filenames = unique_filenames(
+        [format_filename(PATTERN, meta, fields) for meta in metadata_list]
+    )
+    _stage(stages, "filename_planning", time.perf_counter() - started, page_count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        with open(os.path.join(tmp, "summary.csv"), "w", newline="", encoding="utf-8") as f:
+            csv_writer = csv.writer(f)
+            csv_writer.writerow(["Filename"] + fields)
+            for filename, meta in zip(filenames, metadata_list):
+                csv_writer.writerow(summary_row(filename, meta, fields))
+        _stage(stages, "csv_writing", time.perf_counter() - started, page_count)
+
+        entries = list(zip(filenames, issue_ranges))
+        zip_path = os.path.join(tmp, "issues.zip")
+        timings, bytes_saved = _write_zip(zip_path, pdf_bytes, entries, reader, args)
+        for name, seconds in timings.items():
+            _stage(stages, name, seconds, page_count)
+        zip_size = os.path.getsize(zip_path)
+        total = time.perf_counter() - case_started
+
+        resplit = None
+        if args.resplit:
+            resplit = {}
+            timings, _ = _write_zip(
+                os.path.join(tmp, "again.zip"), pdf_bytes, entries, reader, args, zip_path
+            )
+            for name, seconds in timings.items():
+                _stage(resplit, name, seconds, page_count)
+
+    return {
+        "issues": issues,
+        "pages_per_issue": pages_per_issue,
+        "pages": page_count,
+        "detected_issues": len(issue_ranges),
+        "input_bytes": len(pdf_bytes),
+        "zip_bytes": zip_size,
+        "bytes_saved": bytes_saved,
+        "stages": stages,
+        "total_seconds": round(total, 6),
+        "resplit_stages": resplit,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, nargs="+", default=[500])
+    parser.add_argument("--pages-per-issue", type=int, nargs="+", default=[4])
+    parser.add_argument(
+        "--workers", type=int, default=1, help="text extraction and PDF writing workers"
+    )
+    parser.add_argument("--compress-level", type=int, choices=range(1, 10), metavar="1-9")
+    parser.add_argument("--header-only", action="store_true")
+    parser.add_argument("--dedupe", action="store_true")
+    parser.add_argument("--shared-compress-level", type=int, choices=range(1, 10), metavar="1-9")
+    parser.add_argument("--separate-logos", action="store_true")
+    parser.add_argument(
+        "--resplit", action="store_true", help="also time a re-split against the first ZIP"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pypdf2": PyPDF2.__version__,
+        },
+        "options": {
+            "workers": args.workers,
+            "compress_level": args.compress_level,
+            "header_only": args.header_only,
+            "dedupe": args.dedupe,
+            "shared_compress_level": args.shared_compress_level,
+            "separate_logos": args.separate_logos,
+            "resplit": args.resplit,
+            "seed": args.seed,
+        },
+        "cases": [
+            run_case(issues, pages, args)
+            for issues, pages in itertools.product(args.issues, args.pages_per_issue)
+        ],
+    }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
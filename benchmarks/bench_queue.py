@@ -0,0 +1,122 @@
+"""Time many concurrent uploaders parsing reports through the job queue.
+
+Usage::
+
+    python benchmarks/bench_queue.py [--uploaders N] [--distinct D] [--slots S ...]
+        [--issues I] [--pages-per-issue P] [--workers W] [--output results.json]
+
+Each of ``--uploaders`` simulated sessions submits a parse of one of
+``--distinct`` synthetic reports, all at once, to a :class:`jobs.JobRegistry`
+with ``--slots`` running slots; uploaders of the same report share one job,
+as sessions of the app do. Passing the uploader count as a slot count gives
+the old behaviour, where every upload ran at once. For every slot count the
+wait in the queue, the run time and the total latency per uploader are
+reported, along with pages parsed per second overall. Results are written as
+JSON (to stdout unless ``--output`` is given) so separate runs can be
+compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from jobs import JobRegistry  # noqa: E402
+from splitter import iter_issues  # noqa: E402
+from synthetic_report import build_report  # noqa: E402
+
+
+def parse(job, pdf_bytes: bytes, workers: int) -> int:
+    """Job target: detect the issues in a report, reporting progress."""
+    count = 0
+    for issue, _ in iter_issues(pdf_bytes, workers=workers):
+        count += 1
+        job.progress(count, issue["end"])
+    return count
+
+
+def _summary(values) -> dict:
+    values = sorted(values)
+    return {
+        "median": round(statistics.median(values), 3),
+        "p90": round(values[int(0.9 * (len(values) - 1))], 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def run_case(slots: int, reports, args) -> dict:
+    """Submit every uploader's parse at once and wait for all of them."""
+    registry = JobRegistry(max_finished=len(reports), max_running=slots, max_per_owner=1)
+    started = time.time()
+    jobs = []
+    for uploader in range(args.uploaders):
+        report = uploader % len(reports)
+        jobs.append(
+            registry.submit(
+                report, parse, reports[report], args.workers, owner=f"uploader-{uploader}"
+            )
+        )
+    for job in jobs:
+        job.wait()
+    makespan = time.time() - started
+    unique = {id(job): job for job in jobs}.values()
+    pages = sum(job.pages_done for job in unique)
+    return {
+        "slots": slots,
+        "jobs_run": len(unique),
+        "failed": sum(job.status != "done" for job in unique),
+        "queue_wait_seconds": _summary([job.started - started for job in jobs]),
+        "run_seconds": _summary([job.finished - job.started for job in jobs]),
+        "latency_seconds": _summary([job.finished - started for job in jobs]),
+        "makespan_seconds": round(makespan, 3),
+        "pages_per_sec": round(pages / makespan, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploaders", type=int, default=20)
+    parser.add_argument("--distinct", type=int, default=10, help="distinct reports uploaded")
+    parser.add_argument("--slots", type=int, nargs="+", default=[2, 20])
+    parser.add_argument("--issues", type=int, default=100)
+    parser.add_argument("--pages-per-issue", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=1, help="text extraction workers per job")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    reports = [
+        build_report(args.issues, args.pages_per_issue, seed=seed)
+        for seed in range(min(args.distinct, args.uploaders))
+    ]
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "options": {
+            "uploaders": args.uploaders,
+            "distinct": len(reports),
+            "issues": args.issues,
+            "pages_per_issue": args.pages_per_issue,
+            "workers": args.workers,
+        },
+        "cases": [run_case(slots, reports, args) for slots in args.slots],
+    }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Generate synthetic PDFs shaped like BIM 360 issue reports.
+
+Every page carries the ``ID nnnnnn`` header; an issue's first page lists the
+Location / Equipment ID / Priority style fields, and its continuation pages
+hold comment text and a photo. A logo image stands in for the report's
+common resources; it is one object shared by all pages unless
+``--separate-logos`` stores an identical copy for every page instead.
+
+Usage::
+
+    python benchmarks/synthetic_report.py OUT.pdf [--issues N] [--pages-per-issue P]
+"""
+
+import argparse
+import random
+import zlib
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _text_stream(lines) -> bytes:
+    ops = " ".join(f"({_escape(line)}) Tj T*" for line in lines)
+    return f"BT /F1 10 Tf 50 {PAGE_HEIGHT - 40} Td 14 TL {ops} ET".encode()
+
+
+def first_page_lines(issue_id: str, index: int, rng: random.Random) -> list:
+    """Return the text lines of an issue's first page."""
+    return [
+        f"ID {issue_id}",
+        "Issue Report",
+        f"Location Level {index % 12}",
+        f"Location Detail Room {index % 12}.{index % 40:02d}",
+        f"Equipment ID AHU-{index % 300}",
+        f"Equipment Type {rng.choice(['Pump', 'Air Handler', 'Damper', 'Valve'])}",
+        "Responsible Person Jane Doe",
+        f"Root cause {rng.choice(['Design', 'Installation', 'Material'])}",
+        f"Priority {rng.choice(['High', 'Medium', 'Low'])}",
+        "Description",
+    ] + [f"Observation {i}: lorem ipsum dolor sit amet" for i in range(rng.randint(3, 12))]
+
+
+def continuation_lines(issue_id: str, rng: random.Random) -> list:
+    """Return the text lines of an issue's comment/photo page."""
+    return [f"ID {issue_id}", "Comments"] + [
+        f"Comment {i}: consectetur adipiscing elit sed do eiusmod" for i in range(rng.randint(5, 40))
+    ]
+
+
+def build_report(
+    issues: int,
+    pages_per_issue: int,
+    seed: int = 0,
+    photos: bool = True,
+    shared_logo: bool = True,
+) -> bytes:
+    """Return the bytes of a synthetic report with ``issues`` issues."""
+    rng = random.Random(seed)
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    def add_stream(data: bytes, dictionary: str = "") -> int:
+        packed = zlib.compress(data)
+        return add(
+            f"<< {dictionary} /Filter /FlateDecode /Length {len(packed)} >>\nstream\n".encode()
+            + packed
+            + b"\nendstream"
+        )
+
+    pages_id = 1
+    objects.append(b"")  # the page tree, filled in once every page exists
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    logo_pixels = bytes((x * y) % 256 for y in range(48) for x in range(48))
+    logo_dict = (
+        "/Type /XObject /Subtype /Image /Width 48 /Height 48 "
+        "/ColorSpace /DeviceGray /BitsPerComponent 8"
+    )
+    logo = add_stream(logo_pixels, logo_dict)
+
+    kids = []
+    for index, number in enumerate(sorted(rng.sample(range(1, 1000000), issues))):
+        issue_id = f"{number:06d}"
+        for page in range(pages_per_issue):
+            if not shared_logo and (index or page):
+                logo = add_stream(logo_pixels, logo_dict)
+            xobjects = f"/Logo {logo} 0 R"
+            draw = f"q 60 0 0 60 {PAGE_WIDTH - 90} {PAGE_HEIGHT - 80} cm /Logo Do Q "
+            if page == 0:
+                lines = first_page_lines(issue_id, index, rng)
+            else:
+                lines = continuation_lines(issue_id, rng)
+                if photos:
+                    photo = add_stream(
+                        rng.randbytes(64 * 64),
+                        "/Type /XObject /Subtype /Image /Width 64 /Height 64 "
+                        "/ColorSpace /DeviceGray /BitsPerComponent 8",
+                    )
+                    xobjects += f" /Photo {photo} 0 R"
+                    draw += "q 200 0 0 200 330 60 cm /Photo Do Q "
+            content = add_stream(draw.encode() + _text_stream(lines))
+            kids.append(
+                add(
+                    f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                    f"/Resources << /Font << /F1 {font} 0 R >> /XObject << {xobjects} >> >> "
+                    f"/Contents {content} 0 R >>".encode()
+                )
+            )
+
+    objects[pages_id - 1] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+    ).encode()
+    catalog = add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode())
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(out)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output")
+    parser.add_argument("--issues", type=int, default=500)
+    parser.add_argument("--pages-per-issue", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-photos", action="store_true")
+    parser.add_argument("--separate-logos", action="store_true")
+    args = parser.parse_args()
+    with open(args.output, "wb") as f:
+        f.write(
+            build_report(
+                args.issues,
+                args.pages_per_issue,
+                args.seed,
+                not args.no_photos,
+                not args.separate_logos,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
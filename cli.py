@@ -0,0 +1,206 @@
+"""Split BIM 360 issue reports from the command line, without Streamlit.
+
+Usage::
+
+    python cli.py REPORTS... [--pattern PATTERN] [--output-dir DIR] [--jobs N]
+
+Each REPORT may be a PDF, a directory (every ``*.pdf`` inside it is split) or
+a glob such as ``"exports/*_issues.pdf"``. For ``report.pdf`` the tool writes
+``report.zip`` with one PDF per issue and ``report.csv`` with the summary
+table to the output directory. Reports are split concurrently, one process
+per report.
+
+With ``--previous-dir``, ``report.zip`` from that directory (for example last
+week's output directory, or the output directory itself) is used as the
+previous archive: issues that have not changed are copied from it rather than
+split again, provided they were split with the same deduplication settings.
+
+With ``--dedupe``, fonts, images and other streams that a report stores more
+than once are written only once into each issue PDF.
+
+With ``--ocr-workers N``, pages whose text has no issue ID (scanned pages)
+have their header read by Tesseract in up to N processes per report. This
+needs the ``tesseract`` program and the ``pytesseract`` package.
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from splitter import MappedPdf, ReportError, ocr_available, split_report
+
+DEFAULT_PATTERN = "ISSUE_{Issue ID}_{Location Detail}"
+
+
+def find_reports(inputs) -> list:
+    """Return the PDF paths named by ``inputs``, in order and without repeats."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(glob.glob(os.path.join(item, "*.pdf")))
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item))
+        else:
+            matches = [item]
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def split_one(
+    path: str,
+    output_dir: str,
+    pattern: str,
+    compresslevel,
+    header_only: bool,
+    previous_dir=None,
+    dedupe: bool = False,
+    shared_compresslevel=None,
+    ocr_workers: int = 0,
+):
+    """Split the report at ``path``; return ``(zip_path, changes, bytes_saved)``."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    zip_path = os.path.join(output_dir, stem + ".zip")
+    csv_path = os.path.join(output_dir, stem + ".csv")
+    previous = None
+    if previous_dir is not None:
+        previous = os.path.join(previous_dir, stem + ".zip")
+        if not os.path.exists(previous):
+            previous = None
+
+    # Write beside the target and swap it in, so the previous archive can be
+    # the file being replaced.
+    partial_path = zip_path + ".partial"
+    stats = {}
+    try:
+        changes = split_report(
+            MappedPdf(path),
+            partial_path,
+            csv_path,
+            pattern,
+            compresslevel=compresslevel,
+            header_only=header_only,
+            previous=previous,
+            dedupe=dedupe,
+            shared_compresslevel=shared_compresslevel,
+            stats=stats,
+            ocr_workers=ocr_workers,
+        )
+        os.replace(partial_path, zip_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return zip_path, changes, stats.get("bytes_saved", 0)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("reports", nargs="+", help="PDF files, directories or globs")
+    parser.add_argument(
+        "-p", "--pattern", default=DEFAULT_PATTERN, help="filename pattern for each issue PDF"
+    )
+    parser.add_argument("-o", "--output-dir", default=".", help="where ZIP and CSV files go")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, help="reports split at once"
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        choices=range(1, 10),
+        metavar="1-9",
+        help="deflate each PDF in the ZIP (default: store)",
+    )
+    parser.add_argument(
+        "--previous-dir",
+        help="directory holding earlier ZIPs; unchanged issues are copied from them",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="write identical fonts, images and other streams once per issue PDF",
+    )
+    parser.add_argument(
+        "--shared-compress-level",
+        type=int,
+        choices=range(1, 10),
+        metavar="1-9",
+        help="with --dedupe, deflate streams used more than once at this level",
+    )
+    parser.add_argument(
+        "--header-only",
+        action="store_true",
+        help="detect issue IDs from the page header only",
+    )
+    parser.add_argument(
+        "--ocr-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="OCR the header of pages without an issue ID in N processes (default: off)",
+    )
+    args = parser.parse_args(argv)
+    if args.shared_compress_level is not None and not args.dedupe:
+        parser.error("--shared-compress-level requires --dedupe")
+    if args.ocr_workers and not ocr_available():
+        parser.error("--ocr-workers needs the tesseract program and the pytesseract package")
+
+    paths = find_reports(args.reports)
+    if not paths:
+        parser.error("no PDF reports found")
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in paths]
+    clashes = sorted({s for s in stems if stems.count(s) > 1})
+    if clashes:
+        parser.error("reports would overwrite each other's output: " + ", ".join(clashes))
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    failures = 0
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(args.jobs, len(paths))),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        futures = [
+            pool.submit(
+                split_one,
+                path,
+                args.output_dir,
+                args.pattern,
+                args.compress_level,
+                args.header_only,
+                args.previous_dir,
+                args.dedupe,
+                args.shared_compress_level,
+                args.ocr_workers,
+            )
+            for path in paths
+        ]
+        for path, future in zip(paths, futures):
+            try:
+                zip_path, changes, bytes_saved = future.result()
+            except ReportError as e:
+                failures += 1
+                print(f"{path}: cannot read: {e}", file=sys.stderr)
+            except Exception as e:
+                failures += 1
+                print(f"{path}: failed: {e!r}", file=sys.stderr)
+            else:
+                count = sum(len(changes[k]) for k in ("new", "changed", "unchanged"))
+                message = f"{path}: {count} issues -> {zip_path}"
+                if args.previous_dir is not None:
+                    message += (
+                        f" ({len(changes['new'])} new, {len(changes['changed'])} changed,"
+                        f" {len(changes['unchanged'])} unchanged ({len(changes['copied'])} copied),"
+                        f" {len(changes['removed'])} removed)"
+                    )
+                if args.dedupe:
+                    message += f" [{bytes_saved:,} bytes saved by deduplication]"
+                print(message)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Sidecar index of detected issues, so a report seen before is not re-read.
+
+Entries are keyed by the SHA-256 of the report. ``issue_ranges.json`` holds
+each report's page count, detection mode and issue page ranges;
+``issue_metadata.json`` holds the matching per-issue metadata. Both files
+are rewritten atomically, and only the most recently saved
+``MAX_INDEXED_REPORTS`` reports are kept. The files live in a cache
+directory under ``$XDG_CACHE_HOME`` (``~/.cache`` by default) unless the
+``ISSUE_INDEX_DIR`` environment variable names another directory.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+INDEX_DIR = os.environ.get("ISSUE_INDEX_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "bim360-issue-splitter"
+)
+RANGES_FILE = "issue_ranges.json"
+METADATA_FILE = "issue_metadata.json"
+INDEX_VERSION = 1
+MAX_INDEXED_REPORTS = 50
+
+# Streamlit serves every session from threads of one process; the lock keeps
+# their read-modify-write cycles on the index files from interleaving.
+_lock = threading.Lock()
+
+
+def _read(path: str) -> dict:
+    """Return the reports stored in one index file, or ``{}`` if unusable."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return {}
+    reports = data.get("reports")
+    return reports if isinstance(reports, dict) else {}
+
+
+def _write(path: str, reports: dict) -> None:
+    """Replace one index file with ``reports`` without exposing partial writes."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "reports": reports}, f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def load_index(
+    digest: str,
+    page_count: int,
+    header_only: bool,
+    index_dir: str = INDEX_DIR,
+    ocr: bool = False,
+):
+    """Return saved ``(issue_ranges, metadata_list)`` for a report, or ``None``.
+
+    The entry is used only if it was built with the same detection mode and
+    OCR setting, its page count matches the report and its ranges tile the
+    pages in order.
+    """
+    with _lock:
+        ranges_entry = _read(os.path.join(index_dir, RANGES_FILE)).get(digest)
+        metadata_list = _read(os.path.join(index_dir, METADATA_FILE)).get(digest)
+    if not isinstance(ranges_entry, dict) or not isinstance(metadata_list, list):
+        return None
+    if ranges_entry.get("page_count") != page_count:
+        return None
+    if ranges_entry.get("header_only") != header_only:
+        return None
+    if ranges_entry.get("ocr", False) != ocr:
+        return None
+
+    issue_ranges = ranges_entry.get("issue_ranges")
+    if not isinstance(issue_ranges, list) or len(issue_ranges) != len(metadata_list):
+        return None
+    previous_end = None
+    for issue in issue_ranges:
+        if not isinstance(issue, dict):
+            return None
+        start, end = issue.get("start"), issue.get("end")
+        if not isinstance(start, int) or not isinstance(end, int) or start >= end:
+            return None
+        if previous_end is not None and start != previous_end:
+            return None
+        previous_end = end
+    if issue_ranges and issue_ranges[-1]["end"] != page_count:
+        return None
+    return issue_ranges, metadata_list
+
+
+def save_index(
+    digest: str,
+    page_count: int,
+    header_only: bool,
+    issue_ranges,
+    metadata_list,
+    index_dir: str = INDEX_DIR,
+    ocr: bool = False,
+) -> None:
+    """Record the issues detected in a report, evicting the oldest entries."""
+    ranges_path = os.path.join(index_dir, RANGES_FILE)
+    metadata_path = os.path.join(index_dir, METADATA_FILE)
+    os.makedirs(index_dir, exist_ok=True)
+    with _lock:
+        ranges = _read(ranges_path)
+        metadata = _read(metadata_path)
+        ranges[digest] = {
+            "page_count": page_count,
+            "header_only": header_only,
+            "ocr": ocr,
+            "saved": time.time(),
+            "issue_ranges": list(issue_ranges),
+        }
+        metadata[digest] = list(metadata_list)
+
+        newest = sorted(ranges, key=lambda d: ranges[d].get("saved", 0), reverse=True)
+        keep = set(newest[:MAX_INDEXED_REPORTS])
+        ranges = {d: e for d, e in ranges.items() if d in keep}
+        metadata = {d: e for d, e in metadata.items() if d in keep}
+
+        # Metadata first: an entry only loads once its ranges are written too.
+        _write(metadata_path, metadata)
+        _write(ranges_path, ranges)
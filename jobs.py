@@ -0,0 +1,287 @@
+"""Background jobs with progress reporting, cancellation and a bounded queue.
+
+A :class:`JobRegistry` runs each job on its own thread and hands back the
+existing job when the same key is submitted again, so repeated clicks, and
+other sessions asking for the same work, never start a second copy of it.
+At most ``max_running`` jobs run at once; the rest wait in a bounded
+first-in, first-out queue. Finished jobs are kept while anyone still holds
+them, and the most recently used of the rest up to a bound, which also lets
+their results be reused.
+"""
+
+import collections
+import threading
+import time
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's target when the job has been cancelled."""
+
+
+class JobRejected(Exception):
+    """Raised by :meth:`JobRegistry.submit` when a job cannot be queued."""
+
+
+class Job:
+    """One unit of background work and its progress.
+
+    The target is called as ``target(job, *args)`` and reports progress by
+    calling :meth:`progress`, which raises :class:`JobCancelled` once
+    :meth:`cancel` has been requested. Its return value becomes
+    :attr:`result`. ``owners`` holds whoever is waiting for the job, as
+    maintained by :class:`JobRegistry`.
+    """
+
+    def __init__(self, key, target, args=(), total_issues=None, total_pages=None, group=None):
+        self.key = key
+        self.group = group
+        self.status = "queued"
+        self.issues_done = 0
+        self.pages_done = 0
+        self.total_issues = total_issues
+        self.total_pages = total_pages
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.owners = set()
+        self.on_evict = None
+        self._target = target
+        self._args = args
+        self._on_finish = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        try:
+            with self._lock:
+                if self.status == "cancelled":
+                    return
+                self.status = "running"
+                self.started = time.time()
+            try:
+                self.result = self._target(self, *self._args)
+            except JobCancelled:
+                self.status = "cancelled"
+            except Exception as e:
+                self.error = e
+                self.status = "failed"
+            else:
+                self.status = "done"
+            self._finish()
+        finally:
+            if self._on_finish is not None:
+                self._on_finish(self)
+
+    def _finish(self) -> None:
+        self.finished = time.time()
+        self._target = self._args = None
+        self._finished.set()
+
+    def start(self) -> "Job":
+        self._thread.start()
+        return self
+
+    def progress(self, issues_done=None, pages_done=None) -> None:
+        """Record progress; raise :class:`JobCancelled` if cancelled."""
+        if issues_done is not None:
+            self.issues_done = issues_done
+        if pages_done is not None:
+            self.pages_done = pages_done
+        if self._cancel.is_set():
+            raise JobCancelled
+
+    def cancel(self) -> None:
+        """Ask the job to stop at its next progress report.
+
+        A job still waiting in the queue is cancelled at once.
+        """
+        self._cancel.set()
+        with self._lock:
+            if self.status == "queued":
+                self.status = "cancelled"
+                self._finish()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def cancelling(self) -> bool:
+        return self._cancel.is_set() and not self.done
+
+    def wait(self, timeout=None) -> bool:
+        """Block until the job finishes; return whether it has."""
+        self._finished.wait(timeout)
+        return self.done
+
+    def fraction(self) -> float:
+        """Return completed work as a fraction between 0 and 1."""
+        if self.status == "done":
+            return 1.0
+        if self.total_pages:
+            return min(self.pages_done / self.total_pages, 1.0)
+        if self.total_issues:
+            return min(self.issues_done / self.total_issues, 1.0)
+        return 0.0
+
+
+class JobRegistry:
+    """Process-wide set of jobs, one per key, run by a bounded pool.
+
+    ``submit`` returns the job already registered under a key unless it
+    failed or was cancelled (or is being cancelled), in which case it is
+    replaced. Finished jobs that still have owners are retained; of the
+    rest only the ``max_finished`` most recently used are. ``max_finished``
+    may instead map each ``group`` given to :meth:`submit` to its own limit.
+    Finished jobs older than ``max_age`` seconds are dropped even if they
+    have owners, for owners that went away without releasing them.
+
+    At most ``max_running`` jobs run at once and at most ``max_queued`` wait
+    for a free slot; each owner may have at most ``max_per_owner`` jobs
+    queued or running. ``None`` lifts a limit.
+    """
+
+    def __init__(
+        self,
+        max_finished: int = 8,
+        max_running=None,
+        max_queued=None,
+        max_per_owner=None,
+        max_age=None,
+    ):
+        self.max_finished = max_finished
+        self.max_age = max_age
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.max_per_owner = max_per_owner
+        self._jobs = collections.OrderedDict()
+        self._queue = collections.deque()
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        key,
+        target,
+        *args,
+        owner=None,
+        total_issues=None,
+        total_pages=None,
+        on_evict=None,
+        group=None,
+    ) -> Job:
+        """Return the job for ``key``, queueing a new one if needed.
+
+        ``owner`` is added to the job's owners, including when an existing
+        job is returned. ``on_evict(job)`` is called once the finished job is
+        dropped, to release whatever its result holds. ``group`` selects the
+        job's ``max_finished`` limit when that is a mapping. Raises
+        :class:`JobRejected` when a new job would exceed the queue or the
+        owner's limit; joining an existing job is always allowed.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            replace = job is None or job.status in ("failed", "cancelled") or job.cancelling
+            if not replace:
+                self._jobs.move_to_end(key)
+                if owner is not None:
+                    job.owners.add(owner)
+                return job
+            if (
+                owner is not None
+                and self.max_per_owner is not None
+                and self._active(owner) >= self.max_per_owner
+            ):
+                raise JobRejected(
+                    f"at most {self.max_per_owner} jobs may be queued or running at once"
+                )
+            if (
+                self.max_queued is not None
+                and not self._has_free_slot()
+                and self._waiting() >= self.max_queued
+            ):
+                raise JobRejected("the job queue is full")
+            job = Job(
+                key,
+                target,
+                args,
+                total_issues=total_issues,
+                total_pages=total_pages,
+                group=group,
+            )
+            if owner is not None:
+                job.owners.add(owner)
+            job.on_evict = on_evict
+            job._on_finish = self._job_finished
+            self._jobs[key] = job
+            self._queue.append(job)
+            self._dispatch()
+            self._evict()
+        return job
+
+    def position(self, job: Job) -> int:
+        """Return the job's place in the queue, counting from 1, or 0 if not queued."""
+        with self._lock:
+            waiting = [queued for queued in self._queue if not queued.done]
+        return waiting.index(job) + 1 if job in waiting else 0
+
+    def release(self, job: Job, owner) -> None:
+        """Remove ``owner`` from the job's owners, cancelling it when none remain.
+
+        A finished job without owners becomes subject to ``max_finished``.
+        """
+        with self._lock:
+            job.owners.discard(owner)
+            if job.done:
+                self._evict()
+                return
+            if job.owners:
+                return
+        job.cancel()
+
+    def _active(self, owner) -> int:
+        return sum(1 for job in self._jobs.values() if owner in job.owners and not job.done)
+
+    def _has_free_slot(self) -> bool:
+        return self.max_running is None or self._running < self.max_running
+
+    def _waiting(self) -> int:
+        return sum(1 for job in self._queue if not job.done)
+
+    def _dispatch(self) -> None:
+        while self._queue and self._has_free_slot():
+            job = self._queue.popleft()
+            if job.done:
+                continue
+            self._running += 1
+            job.start()
+
+    def _job_finished(self, job: Job) -> None:
+        with self._lock:
+            self._running -= 1
+            self._dispatch()
+            self._evict()
+
+    def _evict(self) -> None:
+        now = time.time()
+        stale = []
+        unowned = collections.defaultdict(list)
+        for key, job in self._jobs.items():
+            if not job.done:
+                continue
+            if self.max_age is not None and now - job.finished > self.max_age:
+                stale.append(key)
+            elif not job.owners:
+                unowned[job.group].append(key)
+        for group, keys in unowned.items():
+            limit = self.max_finished
+            if isinstance(limit, dict):
+                limit = limit[group]
+            stale.extend(keys[: max(0, len(keys) - limit)])
+        for key in stale:
+            job = self._jobs.pop(key)
+            if job.on_evict is not None and job.status == "done":
+                job.on_evict(job)
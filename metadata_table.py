@@ -0,0 +1,128 @@
+"""Issue metadata as a pandas table, for the app's summary and exports.
+
+splitter handles one issue at a time so that it runs without pandas. The
+functions here apply the same Issue ID, sanitizing and filename rules to
+whole columns at once, and give the same results as
+:func:`splitter.format_filename` and :func:`splitter.summary_row`.
+"""
+
+import io
+import string
+
+import pandas as pd
+import pyarrow as pa
+
+from splitter import unique_filenames
+
+_FORMATTER = string.Formatter()
+
+
+def normalize_issue_ids(ids: pd.Series) -> pd.Series:
+    """Column version of :func:`splitter.normalize_issue_id`."""
+    stripped = ids.astype("string").str.strip()
+    digits = stripped.str.extract(r"(\d+)", expand=False).str.lstrip("0")
+    return digits.str.replace(r"^$", "0", regex=True).fillna(stripped)
+
+
+def sanitize_column(values: pd.Series) -> pd.Series:
+    """Column version of :func:`splitter.sanitize`."""
+    ascii_values = (
+        values.astype("string")
+        .str.normalize("NFKD")
+        .str.encode("ascii", "ignore")
+        .str.decode("ascii")
+    )
+    return ascii_values.astype("string").str.replace(r"[^\w\-]", "", regex=True)
+
+
+def metadata_frame(metadata_list, fields) -> pd.DataFrame:
+    """Return one row per issue and one string column per name in ``fields``.
+
+    Values an issue lacks are missing (``<NA>``); the Issue ID column is
+    normalized.
+    """
+    frame = pd.DataFrame.from_records(metadata_list, columns=list(fields)).astype("string")
+    if "Issue ID" in frame:
+        frame["Issue ID"] = normalize_issue_ids(frame["Issue ID"])
+    return frame
+
+
+def clean_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Return ``frame`` sanitized for filenames, with ``"NA"`` for missing values."""
+    return frame.fillna("NA").apply(sanitize_column)
+
+
+def format_filenames(pattern: str, clean: pd.DataFrame) -> pd.Series:
+    """Return the PDF filename of every issue, filling ``pattern`` from ``clean``.
+
+    Plain ``{Field}`` references are joined column by column; a pattern
+    using conversions or format specs falls back to ``str.format`` per row.
+    Raises ``KeyError`` when the pattern references a field ``clean`` lacks,
+    and ``ValueError`` or ``IndexError`` when it is malformed (an unmatched
+    brace, an unknown conversion or format spec, a positional field).
+    """
+    parts = []
+    for literal, name, spec, conversion in _FORMATTER.parse(pattern):
+        if literal:
+            parts.append(literal)
+        if name is None:
+            continue
+        if not name or name.isdigit():
+            raise ValueError(f"fields are referenced by name, not {{{name}}}")
+        if name not in clean:
+            raise KeyError(name)
+        if spec or conversion:
+            rows = clean.to_dict("records")
+            return pd.Series(
+                [pattern.format(**row) + ".pdf" for row in rows],
+                index=clean.index,
+                dtype="string",
+            )
+        parts.append(clean[name])
+
+    filenames = pd.Series("", index=clean.index, dtype="string")
+    for part in parts:
+        filenames = filenames + part
+    return filenames + ".pdf"
+
+
+def plan_filenames(pattern: str, clean: pd.DataFrame) -> pd.DataFrame:
+    """Return every issue's ``Rendered`` filename and its final ``Filename``.
+
+    The two differ only where rendered names clash; those are resolved with
+    :func:`splitter.unique_filenames`. Raises as :func:`format_filenames`
+    does.
+    """
+    rendered = format_filenames(pattern, clean)
+    final = rendered
+    if rendered.str.casefold().duplicated().any():
+        final = pd.Series(unique_filenames(list(rendered)), index=clean.index, dtype="string")
+    return pd.DataFrame({"Rendered": rendered, "Filename": final})
+
+
+def summary_frame(frame: pd.DataFrame, filenames: pd.Series) -> pd.DataFrame:
+    """Return the summary table: ``Filename`` then every field, blanks for missing."""
+    summary = frame.fillna("")
+    summary.insert(0, "Filename", filenames)
+    return summary.reset_index(drop=True)
+
+
+def to_csv_bytes(summary: pd.DataFrame) -> bytes:
+    """Return ``summary`` as UTF-8 CSV."""
+    return summary.to_csv(index=False).encode("utf-8")
+
+
+def to_parquet_bytes(summary: pd.DataFrame) -> bytes:
+    """Return ``summary`` as a Parquet file."""
+    buffer = io.BytesIO()
+    summary.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def to_arrow_bytes(summary: pd.DataFrame) -> bytes:
+    """Return ``summary`` as an Arrow IPC (Feather v2) file."""
+    table = pa.Table.from_pandas(summary, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,182 @@
+"""Per-stage wall time, throughput and peak memory for the split pipeline.
+
+Peak memory is the largest resident set size seen while a stage runs,
+summed over the process and every process it started (the extraction,
+writing and OCR workers), sampled from ``/proc`` on a background thread.
+Pages shared between them, such as a memory-mapped report, count once per
+process. Where ``/proc`` is unavailable it falls back to the lifetime peaks
+from ``resource.getrusage`` of the process and of its largest finished
+child. On a shared server the figure includes every session, not only the
+one being profiled.
+"""
+
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Seconds between RSS samples while a stage runs.
+SAMPLE_INTERVAL = 0.02
+
+# Seconds between refreshes of the list of child processes sampled.
+CHILD_SCAN_INTERVAL = 0.25
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss(pid) -> int:
+    """Return the resident set size of ``pid`` in bytes; raise if unreadable."""
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * _PAGE_SIZE
+
+
+def descendant_pids() -> list:
+    """Return the PIDs of every process started by this one, at any depth.
+
+    Children are read from ``/proc/<pid>/task/<tid>/children`` where the
+    kernel provides it, and otherwise from the parent PID of every process.
+    """
+    found = []
+    try:
+        pending = [os.getpid()]
+        while pending:
+            pid = pending.pop()
+            for task in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{task}/children") as f:
+                    children = [int(c) for c in f.read().split()]
+                found.extend(children)
+                pending.extend(children)
+        return found
+    except FileNotFoundError:
+        if found:
+            # A child exited while being walked.
+            return found
+    except OSError:
+        return []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    children = collections.defaultdict(list)
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name in parentheses may itself contain spaces.
+        children[int(stat.rsplit(")", 1)[1].split()[1])].append(int(entry))
+    pending = list(children[os.getpid()])
+    while pending:
+        pid = pending.pop()
+        found.append(pid)
+        pending.extend(children[pid])
+    return found
+
+
+def current_rss(children=None):
+    """Return the RSS in bytes of this process and its children, or ``None``.
+
+    ``children`` lists the child PIDs to include; by default they are looked
+    up with :func:`descendant_pids`.
+    """
+    try:
+        total = _rss("self")
+    except (OSError, ValueError, IndexError):
+        total = None
+    if total is not None:
+        for pid in descendant_pids() if children is None else children:
+            try:
+                total += _rss(pid)
+            except (OSError, ValueError, IndexError):
+                pass  # exited since it was listed
+        return total
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak += resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    return None
+
+
+class _PeakSampler:
+    """Background thread tracking the highest RSS seen until stopped."""
+
+    def __init__(self):
+        self._children = descendant_pids()
+        self._scanned = time.monotonic()
+        self.peak = current_rss(self._children)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            self._sample()
+
+    def _sample(self) -> None:
+        if time.monotonic() - self._scanned >= CHILD_SCAN_INTERVAL:
+            self._children = descendant_pids()
+            self._scanned = time.monotonic()
+        rss = current_rss(self._children)
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+class StageProfiler:
+    """Collects one record per pipeline stage.
+
+    Each record has the stage name, ``seconds``, ``pages``, ``pages_per_sec``
+    and ``peak_rss_mb``. When ``log_path`` is set every record is also
+    appended to that file as a JSON line, tagged with ``context``.
+    """
+
+    def __init__(self, log_path=None, **context):
+        self.records = []
+        self.log_path = log_path
+        self.context = context
+
+    @contextlib.contextmanager
+    def stage(self, name: str, pages=None):
+        """Time the enclosed block and record its peak memory as ``name``."""
+        started = time.perf_counter()
+        with _PeakSampler() as sampler:
+            yield
+        self.record(name, time.perf_counter() - started, pages, sampler.peak)
+
+    def record(self, name: str, seconds: float, pages=None, peak_rss=None) -> None:
+        """Add a record for a stage timed elsewhere."""
+        entry = {
+            "stage": name,
+            "seconds": round(seconds, 4),
+            "pages": pages,
+            "pages_per_sec": round(pages / seconds, 1) if pages and seconds > 0 else None,
+            "peak_rss_mb": round(peak_rss / 2**20, 1) if peak_rss is not None else None,
+        }
+        self.records.append(entry)
+        if self.log_path:
+            line = dict(self.context, time=time.time(), **entry)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(line) + "\n")
+
+    def record_timings(self, parent: str, timings: dict, pages=None) -> None:
+        """Add ``parent/name`` records for sub-stage ``timings`` from splitter."""
+        for name, seconds in timings.items():
+            self.record(f"{parent}/{name}", seconds, pages)
@@ -0,0 +1,1208 @@
+"""PDF processing helpers shared by the Streamlit app and the command line.
+
+Nothing in this module imports Streamlit or pandas, so the functions here can
+run in worker processes started with the ``spawn`` method.
+
+Wherever a function takes ``pdf_bytes``, a :class:`MappedPdf` may be passed
+instead, so large reports are read from disk rather than held in memory.
+"""
+
+import collections
+import csv
+import hashlib
+import importlib.util
+import io
+import math
+import mmap
+import multiprocessing
+import os
+import re
+import shutil
+import struct
+import threading
+import time
+import unicodedata
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    StreamObject,
+)
+
+# Reports shorter than this are extracted serially; starting worker processes
+# costs more than it saves on small files.
+PARALLEL_MIN_PAGES = 200
+
+# Smallest number of pages handed to a single extraction task.
+MIN_CHUNK_PAGES = 16
+
+# Reports with fewer issues than this are written to the ZIP serially.
+PARALLEL_MIN_ISSUES = 50
+
+# Each ZIP entry's comment records which issue it holds, a fingerprint of
+# that issue's pages and the settings its PDF was rendered with, so a later
+# export can be compared against the archive.
+ENTRY_COMMENT_RE = re.compile(
+    rb"issue=(.*);sha256=([0-9a-f]{64})(?:;(dedupe=[01];level=(?:[1-9]|-)))?"
+)
+
+# How deeply nested form XObjects are followed when fingerprinting a page.
+MAX_XOBJECT_DEPTH = 4
+
+# Height, in points from the top of the page, of the band that holds the
+# "ID nnnnnn" header. Header-only extraction keeps only the text drawn in
+# this band and stops reading a page once the ID has been found there.
+HEADER_BAND_POINTS = 72
+
+# Operators that draw text; the position each one starts at decides whether
+# its text lies in the header band.
+_SHOW_TEXT_OPERATORS = (b"Tj", b"TJ", b"'", b'"')
+
+# How far into a file its "%PDF-" header may start.
+PDF_HEADER_WINDOW = 1024
+
+# Number of cross-reference entries checked against the objects they point
+# at when a report is opened. A single mismatch means the table is stale.
+XREF_SAMPLE_ENTRIES = 64
+
+# An object header ("12 0 obj"), as PyPDF2 itself finds them when it
+# rebuilds a cross-reference table.
+_OBJECT_HEADER_RE = re.compile(rb"[\r\n \t][ \t]*(\d+)[ \t]+(\d+)[ \t]+obj")
+
+# Literal strings drawn by the text-showing operators: Tj, ' and " take one
+# string, TJ an array of strings and kerning offsets. Unescaped parentheses
+# inside a string are not matched, so stray "(" in damaged content cannot
+# swallow the strings after it.
+_LITERAL = rb"\((?:\\.|[^\\()])*\)"
+_LITERAL_RE = re.compile(_LITERAL, re.S)
+_SHOWN_TEXT_RE = re.compile(
+    rb"(?P<string>" + _LITERAL + rb")\s*(?:Tj|'|\")"
+    rb"|\[(?P<array>(?:" + _LITERAL + rb"|[^\]])*)\]\s*TJ",
+    re.S,
+)
+# Backslash escapes in literal strings; an escaped line break continues the line.
+_STRING_ESCAPES = {
+    b"n": b"\n",
+    b"r": b"\r",
+    b"t": b"\t",
+    b"b": b"\b",
+    b"f": b"\f",
+    b"\n": b"",
+    b"\r": b"",
+}
+
+ISSUE_ID_RE = re.compile(r"ID\s+(\d+)")
+_COMPLETE_ISSUE_ID_RE = re.compile(r"ID\s+\d+\D")
+
+# Resolution at which a page's header band is rendered for OCR.
+OCR_DPI = 300
+
+# Pages held back, in order, while OCR of an earlier page is pending. Reading
+# further ahead waits for the oldest one.
+OCR_WINDOW_PAGES = 64
+
+# Number of OCR results kept by page fingerprint, across all reports.
+OCR_CACHE_PAGES = 4096
+
+METADATA_FIELDS = [
+    ("Location", "Location"),
+    ("Location Detail", "Location Detail"),
+    ("Equipment ID", "Equipment ID"),
+    ("Equipment Type", "Equipment Type"),
+    ("Project Activity", "Project Activity.*?"),
+    ("Responsible Person", "Responsible Person"),
+    ("Rework Required", "Rework Required\\?"),
+    ("Root Cause", "Root cause"),
+    ("Priority", "Priority"),
+]
+
+# Each label is matched literally, followed by whitespace and the rest of
+# the line. _FIELD_LABELS_RE finds every label occurrence in one pass,
+# preferring the longest label at a position; _FIELDS_AT_LABEL lists the
+# fields that can start there (those whose label is a prefix of the one
+# found, e.g. "Location" at "Location Detail"). No label can start inside
+# another, so the non-overlapping scan does not miss any candidate.
+_FIELD_PATTERNS = {
+    key: re.compile(fr"{re.escape(field)}\s+(.*?)\n") for key, field in METADATA_FIELDS
+}
+_FIELD_LABELS_RE = re.compile(
+    "|".join(
+        re.escape(field)
+        for field in sorted({field for _, field in METADATA_FIELDS}, key=len, reverse=True)
+    )
+)
+_FIELDS_AT_LABEL = {
+    label: [key for key, field in METADATA_FIELDS if label.startswith(field)]
+    for _, label in METADATA_FIELDS
+}
+
+_worker_reader = None
+_worker_pdfium = None
+
+_ocr_cache = collections.OrderedDict()
+_ocr_cache_lock = threading.Lock()
+
+
+def sanitize(value: str) -> str:
+    """Return a filesystem friendly representation of value."""
+    return re.sub(r"[^\w\-]", "", unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode())
+
+
+def normalize_issue_id(raw: str) -> str:
+    """Return the issue ID without leading zeros."""
+    raw_str = str(raw).strip()
+
+    # Extract the numeric portion if present
+    match = re.search(r"\d+", raw_str)
+    if match:
+        digits = match.group(0)
+        digits = digits.lstrip("0")
+        return digits or "0"
+
+    # Fall back to original string if no digits are found
+    return raw_str
+
+
+# PyPDF2 wraps parts of its text layout in ``except Exception``, so the signal
+# used to abandon a page derives from BaseException to get past those.
+class _HeaderPassed(BaseException):
+    """Raised from the text visitor to stop reading below the header band."""
+
+
+def header_text(page) -> str:
+    """Return the text drawn in the header band at the top of ``page``.
+
+    Text drawn below :data:`HEADER_BAND_POINTS` is dropped wherever it comes
+    in the content stream, so a footer drawn before the header does not hide
+    it. Extraction is abandoned once a complete issue ID has been read from
+    the band, which skips the layout work for the rest of the page (comments,
+    photos).
+    """
+    floor = float(page.mediabox.top) - HEADER_BAND_POINTS
+    parts = []
+    # PyPDF2 reports the text position after the line has been flushed, so
+    # the heights at which the pending text was drawn are noted here first.
+    drawn_at = []
+
+    def before(operator, operands, cm, tm):
+        if operator in _SHOW_TEXT_OPERATORS:
+            drawn_at.append(tm[5] * cm[3] + cm[5])
+
+    def visit(text, cm, tm, font_dict, font_size):
+        if not text:
+            return
+        heights = drawn_at or [tm[5] * cm[3] + cm[5]]
+        in_band = max(heights) >= floor
+        drawn_at.clear()
+        if not in_band:
+            return
+        parts.append(text)
+        # The ID only counts once something follows it, so its digits are
+        # not cut short by a line flushed in pieces.
+        if _COMPLETE_ISSUE_ID_RE.search("".join(parts)):
+            raise _HeaderPassed
+
+    try:
+        page.extract_text(visitor_operand_before=before, visitor_text=visit)
+    except _HeaderPassed:
+        pass
+    return "".join(parts)
+
+
+def _add_time(timings, key: str, started: float) -> None:
+    """Add the time since ``started`` to ``timings[key]``, if timing is on."""
+    if timings is not None:
+        timings[key] = timings.get(key, 0.0) + time.perf_counter() - started
+
+
+def _timed(iterable, timings, key: str):
+    """Yield from ``iterable``, adding the time spent producing items to ``timings``."""
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            _add_time(timings, key, started)
+            return
+        _add_time(timings, key, started)
+        yield item
+
+
+class _PositionTracker:
+    """Write-only stream wrapper that reports how many bytes went through it.
+
+    PdfWriter.write() needs ``tell()`` to record object offsets; ZIP entries
+    opened for writing are not seekable, so the position is counted here.
+    Time spent in the wrapped stream (compressing and storing the entry) is
+    added to ``timings["zip_writing"]`` when ``timings`` is given.
+    """
+
+    def __init__(self, raw, timings=None):
+        self._raw = raw
+        self._pos = 0
+        self._timings = timings
+
+    def write(self, data) -> int:
+        started = time.perf_counter()
+        self._raw.write(data)
+        _add_time(self._timings, "zip_writing", started)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+
+def write_issue_pdf(
+    reader,
+    issue: dict,
+    stream,
+    timings=None,
+    dedupe: bool = False,
+    shared_compresslevel=None,
+) -> int:
+    """Write the pages of ``issue`` from ``reader`` as a PDF to ``stream``.
+
+    ``stream`` only needs a ``write`` method, so this can target a ZIP entry
+    opened with ``ZipFile.open(name, "w")`` directly. With ``dedupe``,
+    identical streams are written once (see :func:`dedupe_streams`). Returns
+    the bytes that saved, or 0.
+    """
+    writer = PdfWriter()
+    for p in range(issue["start"], issue["end"]):
+        writer.add_page(reader.pages[p])
+    saved = dedupe_streams(writer, shared_compresslevel) if dedupe else 0
+    writer.write(_PositionTracker(stream, timings))
+    return saved
+
+
+def _replace_references(obj, remap: dict, writer) -> None:
+    """Point references in ``obj`` to the object numbers ``remap`` gives."""
+    if isinstance(obj, DictionaryObject):
+        items = list(obj.items())
+    elif isinstance(obj, ArrayObject):
+        items = list(enumerate(obj))
+    else:
+        return
+    for key, value in items:
+        if isinstance(value, IndirectObject):
+            if value.idnum in remap:
+                obj[key] = IndirectObject(remap[value.idnum], 0, writer)
+        else:
+            _replace_references(value, remap, writer)
+
+
+def _count_references(obj, counts) -> None:
+    if isinstance(obj, DictionaryObject):
+        values = obj.values()
+    elif isinstance(obj, ArrayObject):
+        values = obj
+    else:
+        return
+    for value in values:
+        if isinstance(value, IndirectObject):
+            counts[value.idnum] += 1
+        else:
+            _count_references(value, counts)
+
+
+def _stream_key(stream) -> tuple:
+    # References in the dictionary compare by object number, so streams that
+    # point at duplicates only match once those have been folded together.
+    entries = sorted((key, repr(value)) for key, value in stream.items() if key != "/Length")
+    return hashlib.sha256(_stream_bytes(stream)).digest(), tuple(entries)
+
+
+def _recompress(stream, level: int) -> int:
+    """Deflate ``stream`` at ``level`` if that shrinks it; return bytes saved."""
+    data = _stream_bytes(stream)
+    filters = stream.get("/Filter")
+    if "/DecodeParms" in stream:
+        return 0
+    if filters is None:
+        raw = data
+    elif filters == "/FlateDecode":
+        try:
+            raw = zlib.decompress(data)
+        except zlib.error:
+            return 0
+    else:
+        # Images in DCT or other formats are already as small as deflate makes them.
+        return 0
+    packed = zlib.compress(raw, level)
+    if len(packed) >= len(data):
+        return 0
+    stream._data = packed
+    stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+    return len(data) - len(packed)
+
+
+def dedupe_streams(writer, compresslevel=None) -> int:
+    """Write each distinct stream in ``writer`` once; return the bytes saved.
+
+    Pages cloned from a report carry their own copies of fonts, logos and
+    other resources whenever the report stored them as separate objects.
+    Streams with the same data and dictionary are folded into the first
+    one and every reference redirected to it; the object numbers of the
+    dropped copies are kept as ``null`` so the rest need no renumbering.
+
+    With ``compresslevel``, streams referenced more than once are deflated
+    again at that level where the result is smaller.
+    """
+    objects = writer._objects
+    saved = 0
+    remap = True
+    while remap:
+        first = {}
+        remap = {}
+        for idnum, obj in enumerate(objects, 1):
+            if isinstance(obj, StreamObject):
+                kept = first.setdefault(_stream_key(obj), idnum)
+                if kept != idnum:
+                    remap[idnum] = kept
+        for idnum in remap:
+            saved += len(_stream_bytes(objects[idnum - 1]))
+            objects[idnum - 1] = NullObject()
+        if remap:
+            for obj in objects:
+                _replace_references(obj, remap, writer)
+
+    if compresslevel is not None:
+        counts = collections.Counter()
+        for obj in objects:
+            _count_references(obj, counts)
+        for idnum, count in counts.items():
+            obj = objects[idnum - 1] if 0 < idnum <= len(objects) else None
+            if count > 1 and isinstance(obj, StreamObject):
+                saved += _recompress(obj, compresslevel)
+    return saved
+
+
+def _stream_bytes(obj) -> bytes:
+    # The still-encoded stream data: hashing it avoids decompressing, and
+    # get_data() would cache a decoded copy on the long-lived reader.
+    data = obj._data
+    return data.encode("latin-1") if isinstance(data, str) else data
+
+
+def _hash_xobjects(resources, digest, depth: int = 0) -> None:
+    """Feed the XObjects named in ``resources`` into ``digest``."""
+    if resources is None or depth > MAX_XOBJECT_DEPTH:
+        return
+    xobjects = resources.get_object().get("/XObject")
+    if xobjects is None:
+        return
+    xobjects = xobjects.get_object()
+    for name in sorted(xobjects):
+        xobject = xobjects[name].get_object()
+        digest.update(name.encode())
+        digest.update(_stream_bytes(xobject))
+        if xobject.get("/Subtype") == "/Form":
+            _hash_xobjects(xobject.get("/Resources"), digest, depth + 1)
+
+
+def issue_fingerprint(reader, issue: dict) -> str:
+    """Return a SHA-256 over the content of the pages of ``issue``.
+
+    Covers each page's media box, its content streams and the images and
+    forms it draws, read without decoding. Fonts and other shared resources
+    are left out, so a re-export of an unchanged issue keeps its fingerprint.
+    """
+    digest = hashlib.sha256()
+    for p in range(issue["start"], issue["end"]):
+        page = reader.pages[p]
+        digest.update(repr([float(v) for v in page.mediabox]).encode())
+        contents = page.get("/Contents")
+        if contents is not None:
+            contents = contents.get_object()
+            streams = contents if isinstance(contents, list) else [contents]
+            for stream in streams:
+                digest.update(_stream_bytes(stream.get_object()))
+        _hash_xobjects(page.get("/Resources"), digest)
+    return digest.hexdigest()
+
+
+def render_settings(dedupe: bool, shared_compresslevel=None) -> str:
+    """Return how an issue PDF was rendered, as recorded in its entry comment."""
+    level = shared_compresslevel if dedupe and shared_compresslevel else "-"
+    return f"dedupe={int(bool(dedupe))};level={level}"
+
+
+def read_entry_fingerprints(zipf) -> dict:
+    """Map issue ID to ``(ZipInfo, fingerprint, settings)`` for a previous ZIP.
+
+    ``settings`` is the entry's :func:`render_settings`, or ``None`` if its
+    comment does not record them. Entries without a fingerprint comment are
+    skipped; for a repeated issue ID the first entry wins.
+    """
+    prior = {}
+    for info in zipf.infolist():
+        m = ENTRY_COMMENT_RE.fullmatch(info.comment)
+        if m:
+            settings = m.group(3).decode() if m.group(3) else None
+            prior.setdefault(m.group(1).decode(), (info, m.group(2).decode(), settings))
+    return prior
+
+
+def _copy_raw_entry(source, info, target, filename: str, comment: bytes) -> None:
+    """Append ``info`` from ``source`` to ``target`` without recompressing it.
+
+    zipfile has no public API for this, so the compressed bytes are copied
+    after a local header written from a copy of the original entry's
+    metadata, and ``target`` is updated the way ``ZipFile.writestr`` would.
+    """
+    source.fp.seek(info.header_offset)
+    header = source.fp.read(zipfile.sizeFileHeader)
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    source.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+
+    copied = zipfile.ZipInfo(filename, date_time=info.date_time)
+    copied.compress_type = info.compress_type
+    copied.CRC = info.CRC
+    copied.compress_size = info.compress_size
+    copied.file_size = info.file_size
+    copied.external_attr = info.external_attr
+    copied.flag_bits = info.flag_bits & ~0x08  # sizes go in the local header
+    copied.comment = comment
+
+    zip64 = max(copied.file_size, copied.compress_size) > zipfile.ZIP64_LIMIT
+    target.fp.seek(target.start_dir)
+    copied.header_offset = target.fp.tell()
+    target.fp.write(copied.FileHeader(zip64))
+    remaining = copied.compress_size
+    while remaining:
+        chunk = source.fp.read(min(remaining, 1 << 20))
+        if not chunk:
+            raise zipfile.BadZipFile(f"truncated entry {info.filename!r}")
+        target.fp.write(chunk)
+        remaining -= len(chunk)
+    target.filelist.append(copied)
+    target.NameToInfo[filename] = copied
+    target.start_dir = target.fp.tell()
+    target._didModify = True
+
+
+class MappedPdf:
+    """A report on disk, read through read-only memory maps of the file.
+
+    Every :func:`open_reader` call maps the file afresh, so each reader has
+    its own position while all of them share the same pages of the OS page
+    cache. Pickling keeps only the path, so worker processes map the file
+    themselves instead of receiving a copy of its bytes.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.size = os.path.getsize(self.path)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def open(self) -> mmap.mmap:
+        """Return a new read-only map of the whole file."""
+        with open(self.path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ReportError(ValueError):
+    """Raised when a file cannot be opened as a report; the message says why."""
+
+
+def _xref_is_stale(reader) -> bool:
+    """Return whether sampled xref entries point somewhere other than their objects."""
+    offsets = reader.xref.get(0, {})
+    free = reader.xref_free_entry.get(0, {})
+    ids = sorted(idnum for idnum in offsets if not free.get(idnum))
+    sample = ids[:: max(1, len(ids) // XREF_SAMPLE_ENTRIES)] + ids[-1:]
+    stream = reader.stream
+    for idnum in sample:
+        stream.seek(offsets[idnum])
+        try:
+            found, _ = reader.read_object_header(stream)
+        except Exception:
+            return True
+        if found != idnum:
+            return True
+    return False
+
+
+def _rebuild_xref(reader) -> None:
+    """Point the xref at every object's actual offset, found in one scan.
+
+    Later definitions of an object win, as they do in incremental updates.
+    Objects already resolved through the stale table are dropped.
+    """
+    stream = reader.stream
+    buffer = stream if isinstance(stream, mmap.mmap) else stream.getbuffer()
+    xref = {}
+    for m in _OBJECT_HEADER_RE.finditer(buffer):
+        xref.setdefault(int(m.group(2)), {})[int(m.group(1))] = m.start(1)
+    reader.xref = xref
+    reader.resolved_objects = {}
+
+
+def open_reader(pdf_bytes) -> PdfReader:
+    """Return a new PdfReader over report bytes or a :class:`MappedPdf`.
+
+    The file is checked before any text is extracted, so an unusable report
+    fails in milliseconds rather than partway through the pages. A stale
+    cross-reference table (offsets shifted by an edit) is rebuilt with one
+    scan of the file; left alone, PyPDF2 would search the whole file again
+    for every object it looks up. An encrypted report is opened with the
+    empty password, which is all that owner-only protection needs.
+
+    Raises :class:`ReportError` for anything that is not a PDF, is damaged
+    beyond repair, needs a password or has no pages.
+    """
+    stream = pdf_bytes.open() if isinstance(pdf_bytes, MappedPdf) else io.BytesIO(pdf_bytes)
+    if b"%PDF-" not in stream.read(PDF_HEADER_WINDOW):
+        raise ReportError("not a PDF file")
+    stream.seek(0)
+    try:
+        reader = PdfReader(stream)
+        if _xref_is_stale(reader):
+            _rebuild_xref(reader)
+        if reader.is_encrypted and not reader.decrypt(""):
+            raise ReportError("the report is protected by a password")
+        page_count = len(reader.pages)
+    except ReportError:
+        raise
+    except Exception as e:
+        raise ReportError(f"the report is damaged and cannot be read ({e})") from e
+    if not page_count:
+        raise ReportError("the report has no pages")
+    return reader
+
+
+def _unescape_literal(literal: bytes) -> str:
+    """Return the text of a PDF literal string, given with its parentheses."""
+    body = re.sub(
+        rb"\\([0-7]{1,3}|.)",
+        lambda m: (
+            bytes([int(m[1], 8) & 0xFF])
+            if m[1][:1].isdigit()
+            else _STRING_ESCAPES.get(m[1], m[1])
+        ),
+        literal[1:-1],
+        flags=re.S,
+    )
+    return body.decode("latin-1")
+
+
+def salvage_text(page) -> str:
+    """Return the text of a page whose content PyPDF2 cannot lay out.
+
+    The strings given to the text-showing operators are read straight from
+    the raw content stream, one line per operator, which is enough to find
+    the issue ID and metadata on a partly corrupted page. Returns ``""`` when
+    even the raw content cannot be read.
+    """
+    try:
+        contents = page.get_contents()
+        data = contents.get_data() if contents is not None else b""
+    except Exception:
+        return ""
+    lines = []
+    for m in _SHOWN_TEXT_RE.finditer(data):
+        if m["array"] is not None:
+            literals = _LITERAL_RE.findall(m["array"])
+        else:
+            literals = [m["string"]]
+        lines.append("".join(_unescape_literal(literal) for literal in literals) + "\n")
+    return "".join(lines)
+
+
+def _page_text(page, header_only: bool) -> str:
+    try:
+        if header_only:
+            text = header_text(page)
+            if ISSUE_ID_RE.search(text):
+                return text
+            # A header laid out differently than expected must not lose the
+            # page its issue, so the whole page is read instead.
+        return page.extract_text()
+    except Exception:
+        # Only the pages that fail to parse pay for the repair.
+        return salvage_text(page)
+
+
+def _init_worker(pdf_bytes: bytes) -> None:
+    """Open this worker's own reader over the shared report bytes."""
+    global _worker_reader
+    _worker_reader = open_reader(pdf_bytes)
+
+
+def _extract_range(bounds: tuple) -> list:
+    """Return the text of pages ``start`` to ``stop`` from the worker reader."""
+    start, stop, header_only = bounds
+    return [_page_text(_worker_reader.pages[i], header_only) for i in range(start, stop)]
+
+
+def iter_pages_text(
+    pdf_bytes: bytes, workers: int = 1, header_only: bool = False, reader=None
+):
+    """Yield the extracted text of every page, in page order.
+
+    With ``workers`` greater than one the page range is split into chunks that
+    are extracted in separate processes, each opening its own reader. The
+    output is identical to the serial path. ``header_only`` yields
+    :func:`header_text` instead of the full page text, except for pages
+    whose header band holds no issue ID. ``reader`` lets the
+    serial path reuse a reader the caller already opened over ``pdf_bytes``.
+    """
+    if reader is None:
+        reader = open_reader(pdf_bytes)
+    page_count = len(reader.pages)
+    if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+        for page in reader.pages:
+            yield _page_text(page, header_only)
+        return
+
+    # A few chunks per worker keeps the pool busy when pages differ in cost.
+    chunk = max(MIN_CHUNK_PAGES, math.ceil(page_count / (workers * 4)))
+    bounds = [
+        (s, min(s + chunk, page_count), header_only)
+        for s in range(0, page_count, chunk)
+    ]
+    pool = ProcessPoolExecutor(
+        max_workers=min(workers, len(bounds)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(pdf_bytes,),
+    )
+    try:
+        for part in pool.map(_extract_range, bounds):
+            yield from part
+    finally:
+        # Closing the generator early drops chunks not yet started.
+        pool.shutdown(cancel_futures=True)
+
+
+def iter_issue_ranges(pages_text):
+    """Yield ``(issue_range, first_page_text)`` for each issue in the report.
+
+    ``pages_text`` may be any iterable of page text. A range is yielded as soon
+    as the first page of the following issue is seen (or the pages run out),
+    and only the current issue's first page is held, so memory use does not
+    grow with the length of the report.
+    """
+    current = None
+    first_text = None
+    page_count = 0
+    for i, text in enumerate(pages_text):
+        page_count = i + 1
+        if text:
+            match = ISSUE_ID_RE.search(text)
+            if match:
+                issue_id = normalize_issue_id(match.group(1))
+                if current is None or issue_id != current["Issue ID"]:
+                    if current is not None:
+                        current["end"] = i
+                        yield current, first_text
+                    current = {"Issue ID": issue_id, "start": i}
+                    first_text = text
+
+    if current is not None:
+        current["end"] = page_count
+        yield current, first_text
+
+
+def extract_metadata(issue_id: str, text: str) -> dict:
+    """Return the metadata fields found on an issue's first page.
+
+    Each field takes its first occurrence on the page, as a separate
+    ``re.search`` per field would, but the page is scanned only once.
+    """
+    data = {"Issue ID": issue_id}
+    if text:
+        found = {}
+        for candidate in _FIELD_LABELS_RE.finditer(text):
+            for key in _FIELDS_AT_LABEL[candidate.group()]:
+                if key not in found:
+                    m = _FIELD_PATTERNS[key].match(text, candidate.start())
+                    if m:
+                        found[key] = m.group(1).strip()
+            if len(found) == len(_FIELD_PATTERNS):
+                break
+
+        for key, _ in METADATA_FIELDS:
+            if found.get(key):
+                data[key] = found[key]
+    return data
+
+
+def ocr_available() -> bool:
+    """Return whether OCR can run: pytesseract, pypdfium2 and Tesseract itself."""
+    return (
+        importlib.util.find_spec("pytesseract") is not None
+        and importlib.util.find_spec("pypdfium2") is not None
+        and shutil.which("tesseract") is not None
+    )
+
+
+def _init_ocr_worker(pdf_bytes: bytes) -> None:
+    """Open this OCR worker's own renderer over the report."""
+    global _worker_pdfium
+    import pypdfium2
+
+    source = pdf_bytes.path if isinstance(pdf_bytes, MappedPdf) else pdf_bytes
+    _worker_pdfium = pypdfium2.PdfDocument(source)
+
+
+def _ocr_header(index: int) -> str:
+    """Return the text Tesseract reads in the header band of page ``index``."""
+    import pytesseract
+
+    page = _worker_pdfium[index]
+    band = page.render(
+        scale=OCR_DPI / 72,
+        crop=(0, max(0.0, page.get_height() - HEADER_BAND_POINTS), 0, 0),
+        grayscale=True,
+    )
+    return pytesseract.image_to_string(band.to_pil())
+
+
+def iter_ocr_fallback(pdf_bytes: bytes, pages_text, workers: int = 1, reader=None):
+    """Yield ``pages_text`` with OCR header text added where the ID is missing.
+
+    Only pages whose text is empty or has no issue ID are OCR'd, and only
+    their header band. The OCR processes (at most ``workers``) are started
+    when the first such page turns up, so reports with a text layer on every
+    page pay for nothing but the ID check. Pages keep their order; at most
+    :data:`OCR_WINDOW_PAGES` are held back waiting for OCR.
+
+    Results are cached by :func:`issue_fingerprint` of the page, so a scanned
+    page seen before, in this report or another, is not OCR'd again.
+    ``reader`` is used to fingerprint pages, as in :func:`iter_pages_text`.
+    """
+    pending = collections.deque()
+    pool = None
+    try:
+        for i, text in enumerate(pages_text):
+            if text and ISSUE_ID_RE.search(text):
+                if not pending:
+                    yield text
+                    continue
+                pending.append((text, None, ""))
+            else:
+                if reader is None:
+                    reader = open_reader(pdf_bytes)
+                key = issue_fingerprint(reader, {"start": i, "end": i + 1})
+                with _ocr_cache_lock:
+                    header = _ocr_cache.get(key)
+                    if header is not None:
+                        _ocr_cache.move_to_end(key)
+                if header is None:
+                    if pool is None:
+                        pool = ProcessPoolExecutor(
+                            max_workers=workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                            initializer=_init_ocr_worker,
+                            initargs=(pdf_bytes,),
+                        )
+                    header = pool.submit(_ocr_header, i)
+                pending.append((text, key, header))
+
+            while pending and (
+                len(pending) > OCR_WINDOW_PAGES
+                or isinstance(pending[0][2], str)
+                or pending[0][2].done()
+            ):
+                yield _merge_ocr(*pending.popleft())
+        while pending:
+            yield _merge_ocr(*pending.popleft())
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _merge_ocr(text: str, key, header) -> str:
+    """Return a page's text with its OCR'd header in front, caching new OCR."""
+    if key is None:
+        return text
+    if not isinstance(header, str):
+        try:
+            header = header.result()
+        except Exception:
+            # The page is left as it was and tried again the next time it is read.
+            return text
+        with _ocr_cache_lock:
+            _ocr_cache[key] = header
+            while len(_ocr_cache) > OCR_CACHE_PAGES:
+                _ocr_cache.popitem(last=False)
+    return header + "\n" + text if text else header
+
+
+def iter_issues(
+    pdf_bytes: bytes,
+    workers: int = 1,
+    header_only: bool = False,
+    reader=None,
+    timings=None,
+    ocr_workers: int = 0,
+):
+    """Yield ``(issue_range, metadata)`` for each issue in the report.
+
+    With ``header_only`` boundaries are detected from :func:`header_text` and
+    the full text is extracted only for each issue's first page, where the
+    metadata fields are read. ``reader`` is reused for any pages read in this
+    process, as in :func:`iter_pages_text`. With ``ocr_workers`` pages
+    without an issue ID go through :func:`iter_ocr_fallback` using that many
+    OCR processes.
+
+    If ``timings`` is a dict, the seconds spent on ``"text_extraction"``,
+    ``"boundary_detection"`` and ``"metadata_parsing"`` are added to it.
+    """
+    if header_only and reader is None:
+        reader = open_reader(pdf_bytes)
+    pages_text = iter_pages_text(
+        pdf_bytes, workers=workers, header_only=header_only, reader=reader
+    )
+    if ocr_workers:
+        pages_text = iter_ocr_fallback(pdf_bytes, pages_text, ocr_workers, reader=reader)
+    pages_text = _timed(pages_text, timings, "text_extraction")
+    # Time spent in the range generator includes pulling pages from
+    # pages_text; it is subtracted again below. Full first-page extraction in
+    # header-only mode is kept apart until then and counted as extraction.
+    ranges = _timed(iter_issue_ranges(pages_text), timings, "_ranges")
+    for issue, text in ranges:
+        if header_only:
+            started = time.perf_counter()
+            # A scanned first page keeps the header text OCR found for it.
+            text = _page_text(reader.pages[issue["start"]], False) or text
+            _add_time(timings, "_first_pages", started)
+        started = time.perf_counter()
+        meta = extract_metadata(issue["Issue ID"], text)
+        _add_time(timings, "metadata_parsing", started)
+        yield issue, meta
+
+    if timings is not None:
+        extraction = timings.get("text_extraction", 0.0)
+        timings["boundary_detection"] = timings.pop("_ranges", 0.0) - extraction
+        timings["text_extraction"] = extraction + timings.pop("_first_pages", 0.0)
+
+
+def _render_issue(issue: dict, dedupe: bool, shared_compresslevel) -> tuple:
+    """Return ``issue`` serialized as a PDF from the worker reader."""
+    buffer = io.BytesIO()
+    saved = write_issue_pdf(
+        _worker_reader,
+        issue,
+        buffer,
+        dedupe=dedupe,
+        shared_compresslevel=shared_compresslevel,
+    )
+    return buffer.getvalue(), saved
+
+
+def iter_issue_pdfs(
+    pdf_bytes: bytes,
+    issues,
+    workers: int,
+    dedupe: bool = False,
+    shared_compresslevel=None,
+):
+    """Yield ``(pdf_bytes, bytes_saved)`` for each issue, in order.
+
+    Issues are rendered in ``workers`` processes that each open their own
+    reader over ``pdf_bytes``. At most two issues per worker are in flight,
+    so finished PDFs never pile up faster than the caller consumes them.
+    """
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(pdf_bytes,),
+    )
+    try:
+        pending = collections.deque()
+        for issue in issues:
+            pending.append(
+                pool.submit(_render_issue, issue, dedupe, shared_compresslevel)
+            )
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def write_issues_zip(
+    path,
+    pdf_bytes: bytes,
+    entries,
+    workers: int = 1,
+    compresslevel=None,
+    reader=None,
+    previous=None,
+    timings=None,
+    progress=None,
+    dedupe: bool = False,
+    shared_compresslevel=None,
+    stats=None,
+) -> dict:
+    """Write one PDF per ``(filename, issue)`` entry into a ZIP at ``path``.
+
+    Entries are stored in the order given whatever the worker count, so the
+    archive is deterministic. ``compresslevel`` deflates every entry at that
+    level; ``None`` stores them uncompressed. ``reader`` lets the serial path
+    reuse a reader the caller already opened over ``pdf_bytes``.
+
+    Every entry records its issue's fingerprint and :func:`render_settings`.
+    ``previous`` is an earlier archive (path or file object) of the same
+    project: issues whose fingerprint and render settings match an entry
+    there are copied over without being rendered or recompressed. Returns
+    the issue IDs that are ``"new"``, ``"changed"`` or ``"unchanged"``
+    relative to ``previous``, those ``"removed"`` since, and the unchanged
+    ones whose entries were ``"copied"``.
+
+    If ``timings`` is a dict, the seconds spent on ``"fingerprinting"``,
+    ``"pdf_writing"``, ``"zip_writing"`` and ``"zip_copy"`` are added to it.
+
+    ``progress`` is called as ``progress(issues_done, pages_done)`` after
+    each entry is stored. Any exception it raises stops the write; the
+    archive at ``path`` is then incomplete and left to the caller to remove.
+
+    ``dedupe`` and ``shared_compresslevel`` are passed to
+    :func:`write_issue_pdf` for every rendered issue. If ``stats`` is a
+    dict, the total ``"bytes_saved"`` by deduplication is added to it.
+    """
+    entries = list(entries)
+    if reader is None:
+        reader = open_reader(pdf_bytes)
+    started = time.perf_counter()
+    fingerprints = [issue_fingerprint(reader, issue) for _, issue in entries]
+    _add_time(timings, "fingerprinting", started)
+
+    source = zipfile.ZipFile(previous) if previous is not None else None
+    blobs = None
+    try:
+        prior = read_entry_fingerprints(source) if source is not None else {}
+        settings = render_settings(dedupe, shared_compresslevel)
+        changes = {"new": [], "changed": [], "unchanged": [], "removed": [], "copied": []}
+        reused = []
+        for (_, issue), fingerprint in zip(entries, fingerprints):
+            issue_id = issue["Issue ID"]
+            if issue_id not in prior:
+                changes["new"].append(issue_id)
+            elif prior[issue_id][1] != fingerprint:
+                changes["changed"].append(issue_id)
+            else:
+                changes["unchanged"].append(issue_id)
+            # An entry rendered with other settings holds different bytes.
+            copy = issue_id in prior and prior[issue_id][1:] == (fingerprint, settings)
+            if copy:
+                changes["copied"].append(issue_id)
+            reused.append(copy)
+        current_ids = {issue["Issue ID"] for _, issue in entries}
+        changes["removed"] = [i for i in prior if i not in current_ids]
+
+        to_render = [issue for (_, issue), r in zip(entries, reused) if not r]
+        if workers > 1 and len(to_render) >= PARALLEL_MIN_ISSUES:
+            blobs = iter_issue_pdfs(
+                pdf_bytes, to_render, workers, dedupe, shared_compresslevel
+            )
+
+        compression = zipfile.ZIP_STORED if compresslevel is None else zipfile.ZIP_DEFLATED
+        pages_done = 0
+        with zipfile.ZipFile(
+            path, "w", compression=compression, compresslevel=compresslevel
+        ) as zipf:
+            for done, ((filename, issue), fingerprint, r) in enumerate(
+                zip(entries, fingerprints, reused), 1
+            ):
+                pages_done += issue["end"] - issue["start"]
+                comment = f"issue={issue['Issue ID']};sha256={fingerprint};{settings}".encode()
+                if r:
+                    started = time.perf_counter()
+                    info = prior[issue["Issue ID"]][0]
+                    _copy_raw_entry(source, info, zipf, filename, comment)
+                    _add_time(timings, "zip_copy", started)
+                    saved = 0
+                elif blobs is None:
+                    # Entry writes are timed as zip_writing by the tracker
+                    # and taken back out of pdf_writing afterwards.
+                    before = timings.get("zip_writing", 0.0) if timings is not None else 0.0
+                    started = time.perf_counter()
+                    with zipf.open(filename, "w") as entry:
+                        saved = write_issue_pdf(
+                            reader, issue, entry, timings, dedupe, shared_compresslevel
+                        )
+                    if timings is not None:
+                        _add_time(timings, "pdf_writing", started)
+                        timings["pdf_writing"] -= timings["zip_writing"] - before
+                else:
+                    started = time.perf_counter()
+                    blob, saved = next(blobs)
+                    _add_time(timings, "pdf_writing", started)
+                    started = time.perf_counter()
+                    zipf.writestr(filename, blob)
+                    _add_time(timings, "zip_writing", started)
+                # Comments live only in the central directory, written on close.
+                zipf.filelist[-1].comment = comment
+                if stats is not None:
+                    stats["bytes_saved"] = stats.get("bytes_saved", 0) + saved
+                if progress is not None:
+                    progress(done, pages_done)
+    finally:
+        if blobs is not None:
+            blobs.close()
+        if source is not None:
+            source.close()
+    return changes
+
+
+def available_fields(metadata_list) -> list:
+    """Return every metadata field found across ``metadata_list``, sorted."""
+    return sorted({k for meta in metadata_list for k in meta.keys()})
+
+
+def index_issues(issue_ranges) -> dict:
+    """Return a mapping of Issue ID to its position in ``issue_ranges``.
+
+    An ID that occurs more than once maps to its first occurrence.
+    """
+    index = {}
+    for position, issue in enumerate(issue_ranges):
+        index.setdefault(issue["Issue ID"], position)
+    return index
+
+
+def filter_issues(metadata_list, query: str = "", filters=None) -> list:
+    """Return the positions of issues matching ``query`` and ``filters``.
+
+    ``query`` matches, case-insensitively, any part of any field value.
+    ``filters`` maps a field name to the values allowed for it; an issue
+    lacking the field never matches that filter.
+    """
+    query = query.strip().casefold()
+    filters = {key: set(values) for key, values in (filters or {}).items() if values}
+    positions = []
+    for position, meta in enumerate(metadata_list):
+        if any(meta.get(key) not in values for key, values in filters.items()):
+            continue
+        if query and not any(query in str(value).casefold() for value in meta.values()):
+            continue
+        positions.append(position)
+    return positions
+
+
+def format_filename(pattern: str, meta: dict, fields) -> str:
+    """Return the PDF filename for an issue, filling ``pattern`` from ``meta``.
+
+    Every name in ``fields`` is available to the pattern, sanitized and with
+    ``"NA"`` for values the issue lacks. Raises ``KeyError`` when the pattern
+    references a field not in ``fields``.
+    """
+    clean_meta = {}
+    for key in fields:
+        value = meta.get(key, "NA")
+        if key == "Issue ID":
+            value = normalize_issue_id(value)
+        clean_meta[key] = sanitize(value)
+    return pattern.format(**clean_meta) + ".pdf"
+
+
+def unique_filenames(filenames) -> list:
+    """Return ``filenames`` with clashing names made unique, deterministically.
+
+    Names are compared case-insensitively, as Windows and macOS would when
+    the ZIP is extracted. The first issue keeps a name; later ones get
+    ``_2``, ``_3``... before the extension, skipping names already in use.
+    """
+    taken = {name.casefold() for name in filenames}
+    seen = set()
+    # Next suffix to try per clashing name, so large groups stay linear.
+    next_suffix = {}
+    unique = []
+    for name in filenames:
+        key = name.casefold()
+        if key in seen:
+            stem, ext = os.path.splitext(name)
+            n = next_suffix.get(key, 2)
+            while f"{stem}_{n}{ext}".casefold() in taken:
+                n += 1
+            next_suffix[key] = n + 1
+            name = f"{stem}_{n}{ext}"
+            taken.add(name.casefold())
+        seen.add(name.casefold())
+        unique.append(name)
+    return unique
+
+
+def summary_row(filename: str, meta: dict, fields) -> list:
+    """Return the summary CSV row for an issue written as ``filename``."""
+    row_values = []
+    for key in fields:
+        value = meta.get(key, "")
+        if key == "Issue ID":
+            value = normalize_issue_id(value)
+        row_values.append(value)
+    return [filename] + row_values
+
+
+def split_report(
+    pdf_bytes: bytes,
+    zip_path,
+    csv_path,
+    pattern: str,
+    workers: int = 1,
+    compresslevel=None,
+    header_only: bool = False,
+    previous=None,
+    dedupe: bool = False,
+    shared_compresslevel=None,
+    stats=None,
+    ocr_workers: int = 0,
+) -> dict:
+    """Split a report into a ZIP of per-issue PDFs plus a summary CSV.
+
+    Returns the change summary from :func:`write_issues_zip`; ``previous``,
+    ``dedupe``, ``shared_compresslevel`` and ``stats`` are passed through
+    to it, and ``ocr_workers`` to :func:`iter_issues`.
+    """
+    reader = open_reader(pdf_bytes)
+    issue_ranges = []
+    metadata_list = []
+    for issue, meta in iter_issues(
+        pdf_bytes,
+        workers=workers,
+        header_only=header_only,
+        reader=reader,
+        ocr_workers=ocr_workers,
+    ):
+        issue_ranges.append(issue)
+        metadata_list.append(meta)
+
+    fields = available_fields(metadata_list)
+    filenames = unique_filenames(
+        [format_filename(pattern, meta, fields) for meta in metadata_list]
+    )
+    entries = list(zip(filenames, issue_ranges))
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        csv_writer = csv.writer(f)
+        csv_writer.writerow(["Filename"] + fields)
+        for filename, meta in zip(filenames, metadata_list):
+            csv_writer.writerow(summary_row(filename, meta, fields))
+
+    return write_issues_zip(
+        zip_path,
+        pdf_bytes,
+        entries,
+        workers=workers,
+        compresslevel=compresslevel,
+        reader=reader,
+        previous=previous,
+        dedupe=dedupe,
+        shared_compresslevel=shared_compresslevel,
+        stats=stats,
+    )
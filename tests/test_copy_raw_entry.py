@@ -0,0 +1,118 @@
+"""Round-trip issue PDFs through a previous archive without recompressing them.
+
+``write_issues_zip`` copies unchanged issues from the previous archive with
+``_copy_raw_entry``, which writes to ``zipfile`` internals directly; these
+tests pin down that the archives it produces stay valid.
+
+Run with ``python -m pytest tests``.
+"""
+
+import io
+import os
+import struct
+import sys
+import zipfile
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from splitter import iter_issues, write_issues_zip  # noqa: E402
+from synthetic_report import build_report  # noqa: E402
+
+ISSUES = 6
+
+
+@pytest.fixture(scope="module")
+def report():
+    pdf_bytes = build_report(ISSUES, 2)
+    issues = [issue for issue, _ in iter_issues(pdf_bytes)]
+    return pdf_bytes, [(f"{issue['Issue ID']}.pdf", issue) for issue in issues]
+
+
+def _archive(pdf_bytes, entries, compresslevel=None, previous=None) -> io.BytesIO:
+    buffer = io.BytesIO()
+    changes = write_issues_zip(
+        buffer, pdf_bytes, entries, compresslevel=compresslevel, previous=previous
+    )
+    buffer.seek(0)
+    buffer.changes = changes
+    return buffer
+
+
+def _mixed(stored: io.BytesIO, deflated: io.BytesIO) -> io.BytesIO:
+    """Return an archive whose entries alternate between stored and deflated."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(stored) as s, zipfile.ZipFile(deflated) as d, zipfile.ZipFile(
+        buffer, "w"
+    ) as out:
+        for i, (a, b) in enumerate(zip(s.infolist(), d.infolist())):
+            source, info = (s, a) if i % 2 else (d, b)
+            copy = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+            copy.compress_type = info.compress_type
+            copy.comment = info.comment
+            out.writestr(copy, source.read(info))
+    buffer.seek(0)
+    return buffer
+
+
+def _assert_copied(previous: io.BytesIO, result: io.BytesIO, entries) -> None:
+    assert result.changes["copied"] == [issue["Issue ID"] for _, issue in entries]
+    previous.seek(0)
+    with zipfile.ZipFile(previous) as before, zipfile.ZipFile(result) as after:
+        assert after.testzip() is None
+        old, new = before.infolist(), after.infolist()
+        assert [info.filename for info in new] == [name for name, _ in entries]
+        for a, b in zip(old, new):
+            assert b.compress_type == a.compress_type
+            assert (b.CRC, b.compress_size, b.file_size) == (a.CRC, a.compress_size, a.file_size)
+            assert b.comment == a.comment
+            assert after.read(b) == before.read(a)
+
+
+@pytest.mark.parametrize("compresslevel", [None, 6])
+@pytest.mark.parametrize("kind", ["stored", "deflated", "mixed"])
+def test_unchanged_entries_are_copied_intact(report, kind, compresslevel):
+    pdf_bytes, entries = report
+    stored = _archive(pdf_bytes, entries)
+    deflated = _archive(pdf_bytes, entries, compresslevel=9)
+    previous = {"stored": stored, "deflated": deflated}.get(kind) or _mixed(stored, deflated)
+
+    result = _archive(pdf_bytes, entries, compresslevel=compresslevel, previous=previous)
+    _assert_copied(previous, result, entries)
+
+
+def test_copied_entries_can_be_renamed_and_mixed_with_new_ones(report):
+    pdf_bytes, entries = report
+    previous = _archive(pdf_bytes, entries[1:], compresslevel=9)
+    renamed = [(f"renamed-{name}", issue) for name, issue in entries]
+
+    result = _archive(pdf_bytes, renamed, previous=previous)
+    assert result.changes["new"] == [entries[0][1]["Issue ID"]]
+    with zipfile.ZipFile(result) as after, zipfile.ZipFile(previous) as before:
+        assert after.testzip() is None
+        assert after.namelist() == [name for name, _ in renamed]
+        assert after.getinfo(renamed[0][0]).compress_type == zipfile.ZIP_STORED
+        for (name, _), (old_name, _) in zip(renamed[1:], entries[1:]):
+            assert after.read(name) == before.read(old_name)
+
+
+def test_zip64_local_headers(report, monkeypatch):
+    pdf_bytes, entries = report
+    previous = _mixed(_archive(pdf_bytes, entries), _archive(pdf_bytes, entries, 9))
+    # Lowering the limit makes the copied entries, and zipfile's central
+    # directory, use ZIP64 records without needing entries over 4 GiB.
+    monkeypatch.setattr(zipfile, "ZIP64_LIMIT", 1024)
+
+    result = _archive(pdf_bytes, entries, previous=previous)
+    _assert_copied(previous, result, entries)
+    with zipfile.ZipFile(result) as after:
+        for info in after.infolist():
+            result.seek(info.header_offset)
+            header = result.read(zipfile.sizeFileHeader)
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            result.seek(name_length, io.SEEK_CUR)
+            extra = result.read(extra_length)
+            assert struct.unpack("<H", extra[:2])[0] == 1  # the ZIP64 extra field